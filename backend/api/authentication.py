@@ -0,0 +1,176 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from hashlib import sha256
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.authentication import (
+    TokenAuthentication, get_authorization_header
+)
+from rest_framework.authtoken.models import Token
+
+# Поля пользователя, которые не попадают в общий кеш.
+SHARED_DEFERRED_FIELDS = ('password', 'email')
+
+
+class TokenCache:
+    """
+    Кеш «токен -> пользователь» для CachedTokenAuthentication.
+
+    По умолчанию — LRU в памяти процесса на AUTH_TOKEN_CACHE_SIZE
+    записей, каждая живёт AUTH_TOKEN_CACHE_TTL секунд. Сброс токена
+    меняет его версию в кеше Django, и запись с другой версией
+    не используется: при общем CACHE_BACKEND выход и смена пароля сразу
+    действуют во всех воркерах ценой одного чтения кеша на запрос.
+    При AUTH_TOKEN_CACHE_SHARED в общем кеше хранятся сами записи;
+    туда пишется пользователь без SHARED_DEFERRED_FIELDS, они
+    догружаются из БД при обращении.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _shared_key(key):
+        # Сам токен в общий кеш не попадает.
+        return 'auth-token:' + sha256(key.encode()).hexdigest()
+
+    def _version_key(self, key):
+        return self._shared_key(key) + ':version'
+
+    @staticmethod
+    def _shareable(user):
+        fields = [
+            field.attname for field in user._meta.concrete_fields
+            if field.attname not in SHARED_DEFERRED_FIELDS
+        ]
+        return type(user).from_db(
+            user._state.db, fields, [getattr(user, name) for name in fields]
+        )
+
+    def _get_local(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, expires_at, entry_version = entry
+            if expires_at < time.monotonic() or entry_version != version:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # Копия: изменения request.user не попадают в кеш.
+        return copy.copy(user)
+
+    def _set_local(self, key, user, version):
+        expires_at = time.monotonic() + settings.AUTH_TOKEN_CACHE_TTL
+        with self._lock:
+            self._entries[key] = (copy.copy(user), expires_at, version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.AUTH_TOKEN_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        if settings.AUTH_TOKEN_CACHE_SHARED:
+            return cache.get(self._shared_key(key))
+        return self._get_local(key, cache.get(self._version_key(key)))
+
+    def set(self, key, user):
+        if settings.AUTH_TOKEN_CACHE_SHARED:
+            cache.set(
+                self._shared_key(key), self._shareable(user),
+                timeout=settings.AUTH_TOKEN_CACHE_TTL
+            )
+            return
+        self._set_local(key, user, cache.get(self._version_key(key)))
+
+    async def aget(self, key):
+        if settings.AUTH_TOKEN_CACHE_SHARED:
+            return await cache.aget(self._shared_key(key))
+        return self._get_local(
+            key, await cache.aget(self._version_key(key))
+        )
+
+    async def aset(self, key, user):
+        if settings.AUTH_TOKEN_CACHE_SHARED:
+            await cache.aset(
+                self._shared_key(key), self._shareable(user),
+                timeout=settings.AUTH_TOKEN_CACHE_TTL
+            )
+            return
+        self._set_local(key, user, await cache.aget(self._version_key(key)))
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        if settings.AUTH_TOKEN_CACHE_SHARED:
+            cache.delete_many([self._shared_key(key) for key in keys])
+            return
+        # Записи живут не дольше TTL, версия — столько же.
+        version = time.time_ns()
+        cache.set_many(
+            {self._version_key(key): version for key in keys},
+            timeout=settings.AUTH_TOKEN_CACHE_TTL
+        )
+
+    def invalidate_user(self, user_id):
+        """Сбрасывает записи токенов пользователя после его изменения."""
+        self.invalidate(*Token.objects.filter(
+            user_id=user_id
+        ).values_list('key', flat=True))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication, который берёт пользователя по токену из
+    token_cache и обращается к БД только при промахе.
+    Кешируются только действующие токены активных пользователей.
+    """
+
+    def authenticate_credentials(self, key):
+        user = token_cache.get(key)
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user)
+            return user, token
+        return user, self.get_model()(key=key, user=user)
+
+
+async def aauthenticate(request):
+    """
+    Пользователь по заголовку `Authorization: Token ...` для асинхронных
+    представлений, через тот же token_cache. Без токена — AnonymousUser,
+    для недействительного токена — None: ошибку формирует DRF.
+    """
+    auth = get_authorization_header(request).split()
+    keyword = CachedTokenAuthentication.keyword.lower().encode()
+    if not auth or auth[0].lower() != keyword:
+        return AnonymousUser()
+    if len(auth) != 2:
+        return None
+    try:
+        key = auth[1].decode()
+    except UnicodeError:
+        return None
+    user = await token_cache.aget(key)
+    if user is not None:
+        return user
+    try:
+        token = await Token.objects.select_related('user').aget(key=key)
+    except Token.DoesNotExist:
+        return None
+    if not token.user.is_active:
+        return None
+    await token_cache.aset(key, token.user)
+    return token.user
@@ -0,0 +1,111 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+from rest_framework.response import Response
+
+RECIPES_CACHE = 'recipes'
+INGREDIENTS_CACHE = 'ingredients'
+
+
+def _generation_key(namespace):
+    return f'api:{namespace}:generation'
+
+
+def get_generation(namespace):
+    return cache.get_or_set(_generation_key(namespace), time.time_ns, None)
+
+
+async def aget_generation(namespace):
+    return await cache.aget_or_set(
+        _generation_key(namespace), time.time_ns, None
+    )
+
+
+def invalidate_cached_responses(*namespaces):
+    """
+    Сбрасывает кешированные ответы, меняя поколение пространства имён.
+    Срабатывает после коммита, чтобы параллельный запрос не закешировал
+    под новым поколением ещё не зафиксированные данные.
+    """
+    def bump():
+        for namespace in namespaces:
+            cache.set(_generation_key(namespace), time.time_ns(), None)
+    transaction.on_commit(bump)
+
+
+def _normalized_query(request):
+    return urlencode(sorted(
+        (key, value)
+        for key in request.GET
+        for value in request.GET.getlist(key)
+    ))
+
+
+def response_digest(namespace, generation, request):
+    """
+    Хеш ключа кешированного ответа: поколение пространства имён,
+    хост, путь и нормализованные параметры запроса.
+    """
+    key = ':'.join((
+        'api', namespace, str(generation),
+        request.get_host(), request.path, _normalized_query(request),
+    ))
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def response_data_key(namespace, digest):
+    return f'api:{namespace}:response:{digest}'
+
+
+class CachedReadMixin:
+    """
+    Кеширует данные ответов list/retrieve для анонимных пользователей.
+
+    Ключ включает поколение пространства имён `cache_namespace`, хост,
+    путь и нормализованные параметры запроса. Хеш ключа отдаётся как
+    ETag: совпавший If-None-Match даёт 304 без выборки и сериализации.
+    """
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        digest = response_digest(
+            self.cache_namespace, get_generation(self.cache_namespace),
+            request
+        )
+        etag = f'"{digest}"'
+        headers = {'ETag': etag}
+
+        if etag in request.headers.get('If-None-Match', ''):
+            response = Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+        else:
+            data_key = response_data_key(self.cache_namespace, digest)
+            data = cache.get(data_key)
+            if data is None:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                data = response.data
+                cache.set(data_key, data, settings.API_CACHE_TIMEOUT)
+            response = Response(data, headers=headers)
+
+        patch_vary_headers(response, ('Authorization',))
+        return response
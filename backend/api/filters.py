@@ -1,3 +1,7 @@
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Upper
 from django_filters import rest_framework as filters
 from recipes.models import Recipe
 from users.models import User
@@ -30,3 +34,28 @@ class RecipeFilter(filters.FilterSet):
                 )
             return queryset.none()
         return queryset
+
+
+def rank_ingredients(queryset, name, limit):
+    """
+    Поиск ингредиентов с ранжированием: сначала совпадения по началу
+    названия, затем вхождения подстроки и похожие по триграммам
+    (только PostgreSQL) в порядке убывания сходства.
+    """
+    queryset = queryset.annotate(
+        prefix_rank=Case(
+            When(name__istartswith=name, then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    )
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.filter(name__icontains=name).order_by(
+            'prefix_rank', 'name'
+        )[:limit]
+    term = name.upper()
+    return queryset.annotate(upper_name=Upper('name')).filter(
+        Q(upper_name__contains=term) | Q(upper_name__trigram_similar=term)
+    ).annotate(
+        similarity=TrigramSimilarity('upper_name', term)
+    ).order_by('prefix_rank', '-similarity', 'name')[:limit]
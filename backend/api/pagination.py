@@ -1,4 +1,9 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class CustomPagination(PageNumberPagination):
@@ -16,3 +21,127 @@ class CustomPagination(PageNumberPagination):
         if limit and limit.isdigit():
             return min(int(limit), self.max_page_size)
         return self.page_size
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Курсорная пагинация без COUNT(*) и OFFSET.
+    Порядок берётся из `cursor_ordering` представления; курсор хранит
+    значения всех его полей, например (pub_date, id), поэтому записи
+    с одинаковой датой тоже листаются по индексу, а не смещением.
+    """
+    page_size = CustomPagination.page_size
+    page_size_query_param = 'limit'
+    max_page_size = CustomPagination.max_page_size
+    ordering = ('-pub_date', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, 'cursor_ordering', self.ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, position = self.cursor or (0, False, None)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(
+                order[1:] if order.startswith('-') else f'-{order}'
+                for order in ordering
+            )
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                self._following(queryset.model, ordering, position)
+            )
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following = None
+        if len(results) > len(self.page):
+            following = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None or offset > 0
+            self.has_previous = following is not None
+            self.next_position, self.previous_position = position, following
+        else:
+            self.has_next = following is not None
+            self.has_previous = position is not None or offset > 0
+            self.next_position, self.previous_position = following, position
+        if self.has_previous or self.has_next:
+            self.display_page_controls = True
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            name = order.lstrip('-')
+            if isinstance(instance, dict):
+                values.append(instance[name])
+            else:
+                values.append(getattr(instance, name))
+        return json.dumps([str(value) for value in values])
+
+    def _following(self, model, ordering, position):
+        """
+        Условие «после позиции» в порядке `ordering`: для (-pub_date, -id)
+        это pub_date <= d AND (pub_date < d OR id < i). Первое сравнение
+        задаёт начало просмотра составного индекса, остальные отсекают
+        записи с той же датой.
+        """
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError
+            values = [
+                model._meta.get_field(order.lstrip('-')).to_python(value)
+                for order, value in zip(ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        condition = None
+        for order, value in reversed(tuple(zip(ordering, values))):
+            lookup = 'lt' if order.startswith('-') else 'gt'
+            name = order.lstrip('-')
+            strict = Q(**{f'{name}__{lookup}': value})
+            if condition is None:
+                condition = strict
+            else:
+                condition = Q(**{f'{name}__{lookup}e': value}) & (
+                    strict | condition
+                )
+        return condition
+
+
+class FeedPagination(CustomPagination):
+    """
+    Постраничная пагинация с опциональным курсорным режимом.
+    По умолчанию ответ содержит `count`/`next`/`previous`/`results`,
+    при `?pagination=cursor` — только `next`/`previous`/`results`.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def __init__(self):
+        self.keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        mode = request.query_params.get(self.mode_query_param)
+        if mode == self.cursor_mode:
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,47 @@
+from django.core.files.storage import default_storage
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework import serializers
+
+from recipes.images import SOURCE_KEY
+
+
+def build_image_url(file, request):
+    """
+    Абсолютный URL файла. Адрес строится по имени файла,
+    само хранилище (диск, S3) не опрашивается.
+    """
+    if not file:
+        return None
+    url = file.storage.url(file.name)
+    return request.build_absolute_uri(url) if request else url
+
+
+class ImageURLField(serializers.ReadOnlyField):
+    """Изображение только для чтения в виде ссылки."""
+
+    def to_representation(self, file):
+        return build_image_url(file, self.context.get('request'))
+
+
+class Base64ImageURLField(Base64ImageField):
+    """Принимает изображение в Base64, отдаёт ссылку на файл."""
+
+    def to_representation(self, file):
+        return build_image_url(file, self.context.get('request'))
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    Ссылки на готовые варианты изображения: название -> абсолютный URL.
+    Хранилище не опрашивается, пути берутся из JSON-поля модели.
+    """
+
+    def to_representation(self, variants):
+        request = self.context.get('request')
+        urls = {}
+        for variant, name in variants.items():
+            if variant == SOURCE_KEY:
+                continue
+            url = default_storage.url(name)
+            urls[variant] = request.build_absolute_uri(url) if request else url
+        return urls
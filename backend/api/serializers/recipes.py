@@ -1,9 +1,17 @@
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
-from drf_extra_fields.fields import Base64ImageField
 
-from api.serializers.users import UserSerializer
+from api.serializers.fields import (
+    Base64ImageURLField, ImageURLField, ImageVariantsField
+)
+from api.serializers.users import UserSerializer, get_relations
+from recipes.cart_totals import shift_recipe
+from recipes.counters import delete_rows, shift_counter
 from recipes.models import Recipe, Ingredient, RecipeIngredient
 
+MAX_SERVINGS = 100
+
 
 class IngredientSerializer(serializers.ModelSerializer):
     class Meta:
@@ -13,14 +21,23 @@ class IngredientSerializer(serializers.ModelSerializer):
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
-    image = Base64ImageField(read_only=True)
+    image = ImageURLField()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
         read_only_fields = fields
 
 
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100
+    )
+
+
 class RecipeIngredientReadSerializer(serializers.ModelSerializer):
     id = serializers.ReadOnlyField(source='ingredient.id')
     name = serializers.ReadOnlyField(source='ingredient.name')
@@ -34,51 +51,101 @@ class RecipeIngredientReadSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class IngredientAmountSerializer(serializers.Serializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all()
+class ShoppingListItemSerializer(serializers.Serializer):
+    name = serializers.ReadOnlyField()
+    measurement_unit = serializers.ReadOnlyField()
+    amount = serializers.ReadOnlyField()
+
+
+class ServingsField(serializers.Field):
+    """
+    Порции для списка покупок: `4` — для всех рецептов,
+    `12:2,15:3` — для отдельных рецептов, формы можно сочетать.
+    """
+    default_error_messages = {
+        'invalid': 'Ожидается «порции» или «id_рецепта:порции» через запятую.',
+        'range': f'Порций должно быть от 1 до {MAX_SERVINGS}.',
+    }
+
+    def to_internal_value(self, data):
+        default, per_recipe = 1, {}
+        for part in str(data).split(','):
+            recipe_id, _, count = part.strip().rpartition(':')
+            try:
+                count = int(count)
+                recipe_id = int(recipe_id) if recipe_id else None
+            except ValueError:
+                self.fail('invalid')
+            if not 1 <= count <= MAX_SERVINGS:
+                self.fail('range')
+            if recipe_id is None:
+                default = count
+            else:
+                per_recipe[recipe_id] = count
+        return default, per_recipe
+
+
+class ShoppingListParamsSerializer(serializers.Serializer):
+    servings = ServingsField(required=False)
+
+
+def recipe_ingredients_prefetch():
+    """Ингредиенты рецептов одним запросом вместе с названиями."""
+    return Prefetch(
+        'recipe_ingredients',
+        queryset=RecipeIngredient.objects.select_related('ingredient')
     )
+
+
+class IngredientAmountSerializer(serializers.Serializer):
+    # Существование проверяет RecipeSerializer одним запросом на список.
+    id = serializers.IntegerField(min_value=1)
     amount = serializers.IntegerField(min_value=1)
 
 
 class RecipeSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     ingredients = IngredientAmountSerializer(many=True, write_only=True)
-    image = Base64ImageField()
+    image = Base64ImageURLField()
+    image_variants = ImageVariantsField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = (
-            'id', 'author', 'ingredients', 'image',
+            'id', 'author', 'ingredients', 'image', 'image_variants',
             'name', 'text', 'cooking_time',
             'is_favorited', 'is_in_shopping_cart'
         )
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
+        # После update() DRF сбрасывает предвыборку; уже загруженные
+        # рецепты списка prefetch_related_objects пропускает.
+        prefetch_related_objects([instance], recipe_ingredients_prefetch())
         data['ingredients'] = RecipeIngredientReadSerializer(
             instance.recipe_ingredients.all(),
             many=True,
             context=self.context
         ).data
-        request = self.context.get('request')
-        data['image'] = (
-            request.build_absolute_uri(instance.image.url)
-            if instance.image and request else None
-        )
         return data
 
     def validate_ingredients(self, value):
         if not value:
             raise serializers.ValidationError('Нужен хотя бы один ингредиент.')
-        uniq_ids = {item['id'].id for item in value}
+        uniq_ids = {item['id'] for item in value}
         if len(uniq_ids) != len(value):
             raise serializers.ValidationError(
                 'Ингредиенты не должны повторяться.'
             )
-        return value
+        found = Ingredient.objects.in_bulk(uniq_ids)
+        missing = sorted(uniq_ids - found.keys())
+        if missing:
+            raise serializers.ValidationError(
+                f'Ингредиенты не найдены: {", ".join(map(str, missing))}.'
+            )
+        return [{**item, 'id': found[item['id']]} for item in value]
 
     def validate_image(self, value):
         if not value:
@@ -86,14 +153,10 @@ class RecipeSerializer(serializers.ModelSerializer):
         return value
 
     def get_is_favorited(self, obj):
-        user = self.context.get('request').user
-        return (user.is_authenticated
-                and obj.favorited.filter(user=user).exists())
+        return get_relations(self.context).is_favorited(obj)
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.context.get('request').user
-        return (user.is_authenticated
-                and obj.in_shopping_cart.filter(user=user).exists())
+        return get_relations(self.context).is_in_shopping_cart(obj)
 
     def create_ingredients(self, recipe, ingredients):
         RecipeIngredient.objects.bulk_create(
@@ -103,18 +166,72 @@ class RecipeSerializer(serializers.ModelSerializer):
                 amount=item['amount']
             ) for item in ingredients
         )
+        # bulk_create не отправляет post_save, счётчик обновляем сами.
+        shift_counter(
+            Ingredient.objects.filter(
+                pk__in=[item['id'].pk for item in ingredients]
+            ),
+            'recipes_count', 1
+        )
+
+    def update_ingredients(self, recipe, ingredients):
+        """
+        Приводит ингредиенты рецепта к переданному списку, затрагивая
+        только изменившиеся строки: новые добавляются bulk_create,
+        лишние удаляются одним DELETE, количество — bulk_update.
+        Разница переносится в списки покупок тех, у кого рецепт в корзине.
+        """
+        current = {
+            item.ingredient_id: item
+            for item in recipe.recipe_ingredients.all()
+        }
+        wanted = {item['id'].pk: item['amount'] for item in ingredients}
+        deltas = dict(wanted)
+        for pk, item in current.items():
+            deltas[pk] = deltas.get(pk, 0) - item.amount
+
+        removed = current.keys() - wanted.keys()
+        if removed:
+            # Удаление без выборки строк и сигналов, счётчик — ниже.
+            removed = delete_rows(
+                RecipeIngredient.objects.filter(
+                    recipe=recipe, ingredient_id__in=removed
+                ),
+                returning='ingredient'
+            )
+            shift_counter(
+                Ingredient.objects.filter(pk__in=removed),
+                'recipes_count', -1
+            )
 
+        changed = []
+        for ingredient_id, amount in wanted.items():
+            item = current.get(ingredient_id)
+            if item and item.amount != amount:
+                item.amount = amount
+                changed.append(item)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ['amount'])
+
+        added = [
+            item for item in ingredients if item['id'].pk not in current
+        ]
+        if added:
+            self.create_ingredients(recipe, added)
+        shift_recipe(recipe.pk, deltas)
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         recipe = super().create(validated_data)
         self.create_ingredients(recipe, ingredients)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients')
         super().update(instance, validated_data)
-        instance.recipe_ingredients.all().delete()
-        self.create_ingredients(instance, ingredients)
+        self.update_ingredients(instance, ingredients)
         return instance
 
     def validate(self, attrs):
@@ -2,39 +2,51 @@ from rest_framework import serializers
 from djoser.serializers import UserSerializer as DjoserUserSerializer
 from django.contrib.auth import get_user_model
 
-from recipes.models import Subscription
+from api.serializers.fields import ImageURLField, ImageVariantsField
+from recipes.relations import UserRelations
 
 User = get_user_model()
 
 
+def get_relations(context):
+    """
+    Связи пользователя из контекста сериализатора: переданные явно
+    под ключом `relations` или общие для запроса.
+    """
+    relations = context.get('relations')
+    if relations is None:
+        relations = UserRelations.for_request(context.get('request'))
+    return relations
+
+
+def get_recipes_limit(request):
+    """Значение `?recipes_limit=...` или None, если лимит не задан."""
+    recipes_limit = request.query_params.get('recipes_limit', '').strip()
+    if recipes_limit.isdigit():
+        return int(recipes_limit)
+    return None
+
+
 class UserSerializer(DjoserUserSerializer):
     is_subscribed = serializers.SerializerMethodField()
+    avatar = ImageURLField()
+    avatar_variants = ImageVariantsField()
 
     class Meta(DjoserUserSerializer.Meta):
         model = User
         fields = [
             'email', 'id', 'username', 'first_name',
-            'last_name', 'is_subscribed', 'avatar',
+            'last_name', 'is_subscribed', 'avatar', 'avatar_variants',
         ]
         read_only_fields = fields
 
     def get_is_subscribed(self, user):
-        request = self.context.get('request')
-        return (
-            request
-            and request.user.is_authenticated
-            and Subscription.objects.filter(
-                user=request.user, author=user
-            ).exists()
-        )
+        return get_relations(self.context).is_subscribed(user)
 
 
 class SubscriptionUserSerializer(UserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(
-        source='recipes.count',
-        read_only=True
-    )
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta(UserSerializer.Meta):
         fields = ('recipes', 'recipes_count') + tuple(
@@ -45,10 +57,13 @@ class SubscriptionUserSerializer(UserSerializer):
     def get_recipes(self, user):
         from api.serializers.recipes import ShortRecipeSerializer
         request = self.context.get('request')
-        recipes_limit = request.query_params.get('recipes_limit')
-        recipes = user.recipes.all()
-        if recipes_limit and recipes_limit.strip().isdigit():
-            recipes = recipes[:int(recipes_limit.strip())]
+        # Рецепты страницы подписок загружаются заранее одним запросом.
+        recipes = getattr(user, 'short_recipes', None)
+        if recipes is None:
+            recipes = user.recipes.all()
+            recipes_limit = get_recipes_limit(request)
+            if recipes_limit is not None:
+                recipes = recipes[:recipes_limit]
         return ShortRecipeSerializer(
             recipes,
             many=True,
@@ -0,0 +1,148 @@
+import csv
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+
+import numpy as np
+
+from recipes.models import (
+    Ingredient, Recipe, RecipeIngredient, ShoppingListItem
+)
+from recipes.units import aggregate, scale_factors
+
+CHUNK_SIZE = 2000
+
+
+def _columns(rows, width):
+    columns = tuple(zip(*rows))
+    return columns or ((),) * width
+
+
+def get_cart_ingredients(user, servings=None):
+    """
+    Список покупок: строки (название, единица, количество) с переводом
+    совместимых единиц. Без `servings` берутся готовые суммы корзины,
+    с ним — строки рецептов, умноженные на порции
+    (`servings` — пара: порции по умолчанию и словарь {recipe_id: порции}).
+    """
+    if servings is None:
+        ids, names, units, amounts = _columns(
+            ShoppingListItem.objects.filter(user=user).values_list(
+                'ingredient_id',
+                'ingredient__name',
+                'ingredient__measurement_unit',
+                'total_amount'
+            ), 4
+        )
+        return aggregate(ids, amounts, dict(zip(ids, zip(names, units))))
+
+    default, per_recipe = servings
+    totals = _scaled_totals(
+        RecipeIngredient.objects.filter(
+            recipe__in_shopping_cart__user=user
+        ).values_list('recipe_id', 'ingredient_id', 'amount').iterator(
+            chunk_size=CHUNK_SIZE
+        ),
+        per_recipe, default
+    )
+    catalog = {
+        pk: (name, unit) for pk, name, unit in Ingredient.objects.filter(
+            pk__in=totals
+        ).values_list('id', 'name', 'measurement_unit')
+    }
+    return aggregate(
+        np.fromiter(totals, dtype=np.int64, count=len(totals)),
+        np.fromiter(totals.values(), dtype=np.float64, count=len(totals)),
+        catalog
+    )
+
+
+def _scaled_totals(rows, per_recipe, default):
+    """
+    Суммы {ingredient_id: количество} по строкам (рецепт, ингредиент,
+    количество), умноженным на порции. Строки читаются пачками
+    по CHUNK_SIZE: в памяти одна пачка и суммы различных ингредиентов.
+    """
+    totals = defaultdict(float)
+    while chunk := list(islice(rows, CHUNK_SIZE)):
+        recipe_ids, ids, amounts = np.array(chunk, dtype=np.int64).T
+        unique_ids, row_ingredient = np.unique(ids, return_inverse=True)
+        sums = np.bincount(
+            row_ingredient,
+            weights=amounts * scale_factors(recipe_ids, per_recipe, default)
+        )
+        for pk, total in zip(unique_ids.tolist(), sums.tolist()):
+            totals[pk] += total
+    return totals
+
+
+def get_cart_recipes(user):
+    """Рецепты в корзине вместе с авторами."""
+    return Recipe.objects.filter(
+        in_shopping_cart__user=user
+    ).select_related('author').only(
+        'name', 'author__username',
+        'author__first_name', 'author__last_name'
+    )
+
+
+def _author_name(recipe):
+    return recipe.author.get_full_name() or recipe.author.username
+
+
+def iter_txt(user, servings=None):
+    timestamp = datetime.now().strftime('%d.%m.%Y %H:%M')
+    yield f'Список покупок — {timestamp}\n\n'
+
+    ingredients = get_cart_ingredients(user, servings)
+    for i, item in enumerate(ingredients, start=1):
+        name = item.name.capitalize()
+        yield f'{i}. {name} ({item.measurement_unit}) — {item.amount}\n'
+
+    yield '\nРецепты в списке покупок:\n\n'
+    for recipe in get_cart_recipes(user).iterator(chunk_size=CHUNK_SIZE):
+        yield f'— {recipe.name} (автор: {_author_name(recipe)})\n'
+
+
+class _Echo:
+    """Псевдобуфер: csv.writer возвращает строку вместо записи в файл."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(user, servings=None):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(
+        ('№', 'Ингредиент', 'Единица измерения', 'Количество')
+    )
+
+    ingredients = get_cart_ingredients(user, servings)
+    for i, item in enumerate(ingredients, start=1):
+        yield writer.writerow((
+            i,
+            item.name.capitalize(),
+            item.measurement_unit,
+            item.amount,
+        ))
+
+    yield writer.writerow(())
+    yield writer.writerow(('Рецепт', 'Автор'))
+    for recipe in get_cart_recipes(user).iterator(chunk_size=CHUNK_SIZE):
+        yield writer.writerow((recipe.name, _author_name(recipe)))
+
+
+EXPORTERS = {
+    'txt': iter_txt,
+    'csv': iter_csv,
+}
+
+
+def stream_shopping_list(user, export_format, servings=None):
+    """
+    Генератор строк списка покупок в выбранном формате.
+    Лениво, по мере отправки, выбираются только рецепты: раздел
+    ингредиентов сортируется по названию и сводится целиком до первой
+    строки, в памяти держатся его итоговые строки.
+    """
+    return EXPORTERS[export_format](user, servings)
@@ -0,0 +1,46 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import token_cache
+from api.cache import (
+    INGREDIENTS_CACHE, RECIPES_CACHE, invalidate_cached_responses
+)
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from users.models import User
+
+# Поля пользователя, попадающие в ответы о рецептах.
+PUBLIC_USER_FIELDS = {
+    'email', 'username', 'first_name', 'last_name',
+    'avatar', 'avatar_variants'
+}
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def invalidate_recipes(sender, **kwargs):
+    invalidate_cached_responses(RECIPES_CACHE)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredients(sender, **kwargs):
+    invalidate_cached_responses(INGREDIENTS_CACHE, RECIPES_CACHE)
+
+
+@receiver((post_save, post_delete), sender=User)
+def invalidate_authors(sender, update_fields=None, **kwargs):
+    if update_fields and not PUBLIC_USER_FIELDS & set(update_fields):
+        return
+    invalidate_cached_responses(RECIPES_CACHE)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    # Выход через /api/auth/token/logout/ удаляет токен.
+    token_cache.invalidate(instance.key)
+
+
+@receiver((post_save, post_delete), sender=User)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    # Смена пароля, деактивация, любые изменения профиля и удаление.
+    token_cache.invalidate_user(instance.pk)
@@ -0,0 +1,396 @@
+import tempfile
+from base64 import b64encode
+from io import BytesIO, StringIO
+
+from PIL import Image
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from api.authentication import TokenCache, token_cache
+from api.serializers.recipes import RecipeSerializer
+from recipes.ingredient_index import ingredient_index
+from recipes.models import (
+    Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart,
+    Subscription
+)
+from users.models import User
+
+
+class RecipeQueryBudgetTests(APITestCase):
+    """
+    Число SQL-запросов основных действий с рецептами не зависит
+    от числа рецептов на странице.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass'
+        )
+        authors = [
+            User.objects.create_user(
+                username=f'author{i}', email=f'author{i}@example.com',
+                password='pass'
+            )
+            for i in range(3)
+        ]
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {i}', measurement_unit='г')
+            for i in range(5)
+        )
+        cls.recipes = []
+        for i in range(6):
+            recipe = Recipe.objects.create(
+                author=authors[i % len(authors)], name=f'Рецепт {i}',
+                text='Описание', cooking_time=10
+            )
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient=item, amount=10)
+                for item in ingredients
+            )
+            cls.recipes.append(recipe)
+        Favorite.objects.create(user=cls.user, recipe=cls.recipes[0])
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipes[1])
+        Subscription.objects.create(user=cls.user, author=authors[0])
+        cls.recipe = cls.recipes[2]
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+
+    def get(self, url, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list_anonymous(self):
+        response = self.get('/api/recipes/', 3)
+        self.assertEqual(len(response.data['results']), 6)
+
+    def test_list_authenticated(self):
+        self.client.force_authenticate(self.user)
+        response = self.get('/api/recipes/', 6)
+        flags = {
+            item['id']: (item['is_favorited'], item['is_in_shopping_cart'])
+            for item in response.data['results']
+        }
+        self.assertEqual(flags[self.recipes[0].pk], (True, False))
+        self.assertEqual(flags[self.recipes[1].pk], (False, True))
+        subscribed = {
+            item['author']['id']: item['author']['is_subscribed']
+            for item in response.data['results']
+        }
+        self.assertEqual(subscribed[self.recipes[0].author_id], True)
+        self.assertEqual(subscribed[self.recipes[1].author_id], False)
+
+    def test_list_budget_independent_of_page_size(self):
+        # Флаги берутся из множеств UserRelations: по запросу на
+        # множество, а не на рецепт или автора.
+        self.client.force_authenticate(self.user)
+        for limit in (1, 3, 6):
+            with self.subTest(limit=limit):
+                response = self.get(f'/api/recipes/?limit={limit}', 6)
+                self.assertEqual(len(response.data['results']), limit)
+
+    def test_retrieve(self):
+        self.client.force_authenticate(self.user)
+        self.get(f'/api/recipes/{self.recipe.pk}/', 5)
+
+    def test_update(self):
+        self.client.force_authenticate(self.recipe.author)
+        ingredients = [
+            {'id': item.ingredient_id, 'amount': 20}
+            for item in self.recipe.recipe_ingredients.all()
+        ]
+        # Не зависит от числа ингредиентов в запросе.
+        with self.assertNumQueries(12):
+            response = self.client.patch(
+                f'/api/recipes/{self.recipe.pk}/',
+                {'ingredients': ingredients}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_favorite(self):
+        self.client.force_authenticate(self.user)
+        url = f'/api/recipes/{self.recipe.pk}/favorite/'
+        with self.assertNumQueries(5):
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, 201)
+        with self.assertNumQueries(5):
+            response = self.client.delete(url)
+        self.assertEqual(response.status_code, 204)
+
+    def test_shopping_cart(self):
+        self.client.force_authenticate(self.user)
+        url = f'/api/recipes/{self.recipe.pk}/shopping_cart/'
+        # Корзина ещё обновляет сохранённый список покупок.
+        with self.assertNumQueries(8):
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, 201)
+        with self.assertNumQueries(7):
+            response = self.client.delete(url)
+        self.assertEqual(response.status_code, 204)
+
+    def test_favorite_bulk_counters(self):
+        self.client.force_authenticate(self.user)
+        url = '/api/recipes/favorite/'
+        ids = [self.recipes[0].pk, self.recipe.pk, 10 ** 6]
+        response = self.client.post(url, {'recipes': ids}, format='json')
+        self.assertEqual(
+            [item['status'] for item in response.data['results']],
+            ['exists', 'added', 'not_found']
+        )
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
+        response = self.client.delete(url, {'recipes': ids}, format='json')
+        self.assertEqual(
+            [item['status'] for item in response.data['results']],
+            ['removed', 'removed', 'not_found']
+        )
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 0)
+
+
+class KeysetPaginationTests(APITestCase):
+    """Курсор листает рецепты с одинаковой датой без пропусков."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass'
+        )
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=author, name=f'Рецепт {i}', text='Описание',
+                cooking_time=10
+            )
+            for i in range(14)
+        )
+        # Как после importrecipes: у части рецептов одна дата.
+        Recipe.objects.filter(pk__in=Recipe.objects.order_by('id').values(
+            'id'
+        )[2:12]).update(pub_date=timezone.now())
+        cls.expected = list(Recipe.objects.order_by(
+            '-pub_date', '-id'
+        ).values_list('id', flat=True))
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([item['id'] for item in response.data['results']])
+            url = response.data[link]
+        return pages
+
+    def test_walk_forward_and_back(self):
+        pages = self.walk('/api/recipes/?pagination=cursor&limit=4', 'next')
+        self.assertEqual(sum(pages, []), self.expected)
+        last = self.client.get(
+            '/api/recipes/?pagination=cursor&limit=4'
+        ).data
+        for _ in range(len(pages) - 1):
+            last = self.client.get(last['next']).data
+        back = self.walk(last['previous'], 'previous')
+        self.assertEqual(sum(reversed(back), []), self.expected[:-2])
+
+    def test_invalid_cursor(self):
+        # Позиция в курсоре без id: p=["2020-01-01"].
+        cursor = b64encode(b'p=%5B%222020-01-01%22%5D').decode()
+        response = self.client.get(
+            f'/api/recipes/?pagination=cursor&cursor={cursor}'
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(), AVATAR_CONTENT_HASH_NAMES=False
+)
+class AvatarUploadTests(APITestCase):
+    """Имя файла аватара от клиента не попадает в его адрес."""
+
+    def test_multipart_avatar_gets_random_name(self):
+        user = User.objects.create_user(
+            username='avatar', email='avatar@example.com', password='pass'
+        )
+        self.client.force_authenticate(user)
+        image = BytesIO()
+        Image.new('RGB', (1, 1)).save(image, 'PNG')
+        response = self.client.put(
+            '/api/users/me/avatar/',
+            {'avatar': SimpleUploadedFile('a.png', image.getvalue())},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(
+            response.data['avatar'], r'/avatars/[0-9a-f-]{36}\.png$'
+        )
+
+
+@override_settings(AUTH_TOKEN_CACHE_SHARED=True)
+class SharedTokenCacheTests(APITestCase):
+    """В общий кеш токенов не попадают пароль и почта."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_user_without_secrets(self):
+        user = User.objects.create_user(
+            username='cached', email='cached@example.com', password='pass'
+        )
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        for _ in range(2):
+            response = self.client.get('/api/users/me/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['email'], 'cached@example.com')
+        cached = cache.get(token_cache._shared_key(token.key))
+        self.assertEqual(cached.pk, user.pk)
+        self.assertEqual(
+            cached.get_deferred_fields(), {'password', 'email'}
+        )
+
+
+class DerivedFieldsSaveTests(APITestCase):
+    """Сохранение модели не затирает счётчики, сдвинутые параллельно."""
+
+    def test_patch_from_stale_instance_keeps_favorites_count(self):
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass'
+        )
+        reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass'
+        )
+        ingredient = Ingredient.objects.create(
+            name='Мука', measurement_unit='г'
+        )
+        recipe = Recipe.objects.create(
+            author=author, name='Рецепт', text='Описание', cooking_time=10
+        )
+        RecipeIngredient.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=100
+        )
+        stale = Recipe.objects.get(pk=recipe.pk)
+        self.client.force_authenticate(reader)
+        response = self.client.post(f'/api/recipes/{recipe.pk}/favorite/')
+        self.assertEqual(response.status_code, 201)
+
+        request = APIRequestFactory().patch(f'/api/recipes/{recipe.pk}/')
+        request.user = author
+        serializer = RecipeSerializer(
+            stale, partial=True, context={'request': request}, data={
+                'name': 'Новое название',
+                'ingredients': [{'id': ingredient.pk, 'amount': 200}],
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.name, 'Новое название')
+        self.assertEqual(recipe.favorites_count, 1)
+        author.save()
+        author.refresh_from_db()
+        self.assertEqual(author.recipes_count, 1)
+
+
+class TokenRevocationTests(APITestCase):
+    """Удалённый токен отвергают и кеши других процессов."""
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+
+    def test_deleted_token_rejected_by_other_cache(self):
+        user = User.objects.create_user(
+            username='worker', email='worker@example.com', password='pass'
+        )
+        key = Token.objects.create(user=user).key
+        # Кеш другого воркера с общим кешем Django.
+        other = TokenCache()
+        other.set(key, user)
+        self.assertEqual(other.get(key), user)
+
+        Token.objects.filter(key=key).delete()
+        self.assertIsNone(other.get(key))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+        response = self.client.get('/api/users/me/')
+        self.assertEqual(response.status_code, 401)
+
+
+class LoadIngredientsTests(APITestCase):
+    """Ошибки в файле JSON называют номер элемента или строки."""
+
+    def load(self, content, suffix):
+        with tempfile.NamedTemporaryFile(
+            'w', suffix=suffix, encoding='utf-8'
+        ) as file:
+            file.write(content)
+            file.flush()
+            call_command('loadingredients', file.name, stdout=StringIO())
+
+    def test_invalid_items(self):
+        cases = (
+            ('[{"name": "Соль", "measurement_unit": "г"}, 5]', '.json',
+             'Элемент 2: ожидался объект.'),
+            ('[{"name": "Соль"}]', '.json',
+             'Элемент 1: нет поля measurement_unit.'),
+            ('{"name": "Соль", "measurement_unit": "г"}\n\n["Соль"]\n',
+             '.jsonl', 'Строка 3: ожидался объект.'),
+        )
+        for content, suffix, message in cases:
+            with self.subTest(content=content):
+                with self.assertRaisesMessage(CommandError, message):
+                    self.load(content, suffix)
+
+
+class MetricsEndpointTests(APITestCase):
+    """Метрики отдаются только при METRICS_ENABLED и без текста SQL."""
+
+    def test_disabled_by_default(self):
+        with override_settings(METRICS_ENABLED=False):
+            self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @override_settings(METRICS_ENABLED=True, METRICS_ALLOWED_IPS=[])
+    def test_enabled_without_sql(self):
+        self.client.get('/api/recipes/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'RecipeViewSet.list')
+        self.assertNotContains(response, 'SELECT')
+
+    @override_settings(METRICS_ENABLED=True, METRICS_ALLOWED_IPS=['10.0.0.1'])
+    def test_allowed_ips(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        response = self.client.get('/metrics', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 200)
+
+
+class IngredientSearchTests(APITestCase):
+    """Поиск ингредиентов по ?name= ранжирует результаты."""
+
+    def setUp(self):
+        cache.clear()
+        ingredient_index.invalidate()
+
+    def test_prefix_matches_first_then_substring(self):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='мл') for name in (
+                'сгущённое молоко', 'Молоко топлёное', 'масло',
+                'кокосовое молоко', 'молоко'
+            )
+        )
+        response = self.client.get('/api/ingredients/?name=молоко')
+        self.assertEqual([item['name'] for item in response.data], [
+            'молоко', 'Молоко топлёное', 'кокосовое молоко',
+            'сгущённое молоко'
+        ])
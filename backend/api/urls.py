@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from api.views.recipes import RecipeViewSet, IngredientViewSet
@@ -8,7 +9,17 @@ router.register('recipes', RecipeViewSet, basename='recipes')
 router.register('ingredients', IngredientViewSet, basename='ingredients')
 router.register('users', UserViewSet, basename='users')
 
-urlpatterns = [
+urlpatterns = []
+if settings.ASYNC_VIEWS:
+    # Чтение рецептов и ингредиентов — асинхронно, остальное — DRF.
+    from api.views import async_reads
+    urlpatterns += [
+        path('recipes/', async_reads.recipe_list),
+        path('recipes/<int:pk>/', async_reads.recipe_detail),
+        path('ingredients/', async_reads.ingredient_list),
+    ]
+
+urlpatterns += [
     path('', include(router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
 ]
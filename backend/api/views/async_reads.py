@@ -0,0 +1,233 @@
+"""
+Асинхронные представления для чтения рецептов и ингредиентов.
+
+Подключаются вместо маршрутов DRF при ASYNC_VIEWS и работают под
+ASGI-сервером. Обслуживают только GET с JSON-ответом и распространёнными
+параметрами; остальные методы и запросы, ответ на которые — ошибка
+(недействительный токен, неизвестный автор, несуществующая страница),
+передаются синхронным представлениям DRF, чтобы ответы не отличались.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from api.authentication import aauthenticate
+from api.cache import (
+    INGREDIENTS_CACHE, RECIPES_CACHE, aget_generation, response_data_key,
+    response_digest
+)
+from api.filters import rank_ingredients
+from api.pagination import CustomPagination
+from api.serializers.recipes import IngredientSerializer, RecipeSerializer
+from api.views.recipes import (
+    IngredientViewSet, RecipeViewSet, with_recipe_details
+)
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Ingredient, Recipe
+from recipes.relations import UserRelations
+
+User = get_user_model()
+
+# Фильтры рецептов-флаги -> поле связи с пользователем.
+RECIPE_FLAGS = {
+    'is_favorited': 'favorited__user',
+    'is_in_shopping_cart': 'in_shopping_cart__user',
+}
+PAGE_QUERY_PARAM = 'page'
+
+
+class Fallback(Exception):
+    """Запрос обслуживает синхронное представление DRF."""
+
+
+def with_fallback(sync_view):
+    """
+    Делает асинхронный обработчик GET представлением с запасным
+    синхронным `sync_view` для прочих методов и для Fallback.
+    """
+    sync_view = sync_to_async(sync_view)
+
+    def decorator(handler):
+        @wraps(handler)
+        async def view(request, *args, **kwargs):
+            if request.method == 'GET' and _accepts_json(request):
+                try:
+                    return await handler(request, *args, **kwargs)
+                except Fallback:
+                    pass
+            return await sync_view(request, *args, **kwargs)
+
+        # Как и у представлений DRF: CSRF проверяет сам DRF.
+        view.csrf_exempt = True
+        return view
+    return decorator
+
+
+def _accepts_json(request):
+    # Браузерная страница API и ?format= остаются за DRF.
+    accept = request.headers.get('Accept', '')
+    return 'format' not in request.GET and 'text/html' not in accept
+
+
+def _render(data):
+    return HttpResponse(
+        JSONRenderer().render(data), content_type='application/json'
+    )
+
+
+async def _authenticate(request):
+    user = await aauthenticate(request)
+    if user is None:
+        raise Fallback
+    request.user = user
+    return user
+
+
+async def _cached_response(request, namespace, build):
+    """
+    Ответ с данными `await build()`; для анонимных пользователей —
+    через кеш CachedReadMixin, с теми же ключами и ETag.
+    """
+    user = await _authenticate(request)
+    if user.is_authenticated:
+        response = _render(await build())
+    else:
+        digest = response_digest(
+            namespace, await aget_generation(namespace), request
+        )
+        etag = f'"{digest}"'
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+        else:
+            data_key = response_data_key(namespace, digest)
+            data = await cache.aget(data_key)
+            if data is None:
+                data = await build()
+                await cache.aset(data_key, data, settings.API_CACHE_TIMEOUT)
+            response = _render(data)
+        response['ETag'] = etag
+    patch_vary_headers(response, ('Accept', 'Authorization'))
+    return response
+
+
+async def _recipes(request):
+    """Рецепты с фильтрами RecipeViewSet по автору и флагам."""
+    queryset = with_recipe_details(Recipe.objects.all())
+    params = request.GET
+    author = params.get('author')
+    if author is not None:
+        if not author.isdigit() or not await User.objects.filter(
+            pk=author
+        ).aexists():
+            raise Fallback
+        queryset = queryset.filter(author_id=author)
+    for param, lookup in RECIPE_FLAGS.items():
+        value = params.get(param)
+        if value not in (None, '0', '1'):
+            raise Fallback
+        if value == '1':
+            if not request.user.is_authenticated:
+                return queryset.none()
+            queryset = queryset.filter(**{lookup: request.user})
+    return queryset
+
+
+async def _serialize_recipes(request, recipes, many=False):
+    relations = await UserRelations(request.user).aload()
+    return RecipeSerializer(
+        recipes, many=many,
+        context={'request': request, 'relations': relations}
+    ).data
+
+
+def _page_size(request):
+    limit = request.GET.get(CustomPagination.page_size_query_param)
+    if limit and limit.isdigit():
+        return min(int(limit), CustomPagination.max_page_size)
+    return CustomPagination.page_size
+
+
+async def _paginate(request, queryset):
+    """Страница в формате CustomPagination: count, next, previous."""
+    page_size = _page_size(request)
+    page = request.GET.get(PAGE_QUERY_PARAM, '1')
+    if not page_size or not page.isdigit():
+        raise Fallback
+    page = int(page)
+    count = await queryset.acount()
+    pages = max(1, -(-count // page_size))
+    if not 1 <= page <= pages:
+        raise Fallback
+    offset = (page - 1) * page_size
+    items = []
+    if count:
+        items = [
+            item async for item in queryset[
+                offset:offset + page_size
+            ].aiterator(chunk_size=page_size)
+        ]
+    url = request.build_absolute_uri()
+    next_url = previous_url = None
+    if page < pages:
+        next_url = replace_query_param(url, PAGE_QUERY_PARAM, page + 1)
+    if page == 2:
+        previous_url = remove_query_param(url, PAGE_QUERY_PARAM)
+    elif page > 2:
+        previous_url = replace_query_param(url, PAGE_QUERY_PARAM, page - 1)
+    return items, {'count': count, 'next': next_url, 'previous': previous_url}
+
+
+@with_fallback(RecipeViewSet.as_view({'get': 'list', 'post': 'create'}))
+async def recipe_list(request):
+    if request.GET.get('pagination') == 'cursor':
+        raise Fallback
+
+    async def build():
+        items, data = await _paginate(request, await _recipes(request))
+        data['results'] = await _serialize_recipes(request, items, many=True)
+        return data
+    return await _cached_response(request, RECIPES_CACHE, build)
+
+
+@with_fallback(RecipeViewSet.as_view({
+    'get': 'retrieve', 'put': 'update',
+    'patch': 'partial_update', 'delete': 'destroy',
+}))
+async def recipe_detail(request, pk):
+    async def build():
+        try:
+            recipe = await (await _recipes(request)).aget(pk=pk)
+        except Recipe.DoesNotExist:
+            raise Fallback
+        return await _serialize_recipes(request, recipe)
+    return await _cached_response(request, RECIPES_CACHE, build)
+
+
+@with_fallback(IngredientViewSet.as_view({'get': 'list'}))
+async def ingredient_list(request):
+    async def build():
+        name = request.GET.get('name')
+        if name and request.GET.get('ranked') == '1':
+            ingredients = [
+                item async for item in rank_ingredients(
+                    Ingredient.objects.all(), name,
+                    IngredientViewSet.ranked_search_limit
+                ).aiterator()
+            ]
+        elif name:
+            ingredients = await ingredient_index.arank(
+                name, IngredientViewSet.ranked_search_limit
+            )
+        else:
+            ingredients = [
+                item async for item in Ingredient.objects.aiterator()
+            ]
+        return IngredientSerializer(ingredients, many=True).data
+    return await _cached_response(request, INGREDIENTS_CACHE, build)
@@ -1,7 +1,5 @@
-from datetime import datetime
-
-from django.http import FileResponse
-from django.db.models import Sum
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
@@ -11,45 +9,76 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 
-from api.pagination import CustomPagination
-from api.filters import RecipeFilter
+from api.cache import INGREDIENTS_CACHE, RECIPES_CACHE, CachedReadMixin
+from api.pagination import FeedPagination
+from api.filters import RecipeFilter, rank_ingredients
 from api.permissions import IsAuthorOrReadOnly
+from api.renderers import ShoppingListCSVRenderer, ShoppingListTextRenderer
 from api.serializers.recipes import (
     RecipeSerializer, ShortRecipeSerializer,
-    IngredientSerializer
+    IngredientSerializer, RecipeIdsSerializer, ShoppingListItemSerializer,
+    ShoppingListParamsSerializer, recipe_ingredients_prefetch
 )
-from recipes.models import (
-    Recipe, Ingredient, ShoppingCart,
-    Favorite, RecipeIngredient
+from api.shopping_list import get_cart_ingredients, stream_shopping_list
+from recipes.counters import (
+    delete_rows, insert_rows, shift_relation_counters
 )
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Recipe, Ingredient, ShoppingCart, Favorite
 
 User = get_user_model()
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+def with_recipe_details(queryset):
+    """Автор одним JOIN, ингредиенты одним запросом на страницу."""
+    return queryset.select_related('author').prefetch_related(
+        recipe_ingredients_prefetch()
+    )
+
+
+class IngredientViewSet(CachedReadMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = [AllowAny]
     pagination_class = None
+    ranked_search_limit = 20
+    cache_namespace = INGREDIENTS_CACHE
 
     def get_queryset(self):
-        name = self.request.query_params.get('name')
+        params = self.request.query_params
+        name = params.get('name')
+        if name and params.get('ranked') == '1':
+            # С похожими по триграммам названиями — только в БД.
+            return rank_ingredients(
+                self.queryset, name, self.ranked_search_limit
+            )
+        if name and self.action == 'list':
+            # Автодополнение обслуживается индексом в памяти процесса:
+            # сначала совпадения по началу названия, затем вхождения.
+            return ingredient_index.rank(name, self.ranked_search_limit)
         if name:
             return self.queryset.filter(name__istartswith=name)
         return self.queryset
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CachedReadMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = [IsAuthorOrReadOnly]
-    pagination_class = CustomPagination
+    pagination_class = FeedPagination
+    cursor_ordering = ('-pub_date', '-id')
+    cache_namespace = RECIPES_CACHE
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    # Действия, отдающие полный RecipeSerializer с автором и ингредиентами.
+    full_recipe_actions = {
+        'list', 'retrieve', 'create', 'update', 'partial_update'
+    }
 
     def get_permissions(self):
-        auth_actions = {'create', 'favorite',
-                        'shopping_cart', 'download_shopping_cart'}
+        auth_actions = {'create', 'favorite', 'favorite_bulk',
+                        'shopping_cart', 'shopping_cart_bulk',
+                        'shopping_list', 'download_shopping_cart'}
         if self.action in auth_actions:
             return [IsAuthenticated()]
         elif self.action == 'get_link':
@@ -66,7 +95,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         serializer.save(author=self.request.user)
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = self._plan_queryset(super().get_queryset())
         user = self.request.user
         params = self.request.query_params
 
@@ -85,6 +114,15 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def _plan_queryset(self, queryset):
+        """
+        Подгружает связанные объекты в зависимости от действия:
+        автора одним JOIN, ингредиенты одним запросом на страницу.
+        """
+        if self.action not in self.full_recipe_actions:
+            return queryset
+        return with_recipe_details(queryset)
+
     def _post_delete_action(self, request, recipe, model):
         label_map = {
             'Favorite': 'в избранное',
@@ -93,11 +131,11 @@ class RecipeViewSet(viewsets.ModelViewSet):
         label = label_map.get(model.__name__, 'в список')
 
         if request.method == 'POST':
-            obj, created = model.objects.get_or_create(
-                user=request.user, recipe=recipe
-            )
-
-            if not created:
+            # Один INSERT: повтор отсекает уникальное ограничение.
+            try:
+                with transaction.atomic():
+                    model.objects.create(user=request.user, recipe=recipe)
+            except IntegrityError:
                 data = {"errors": f"Рецепт «{recipe.name}» уже добавлен {label}."}
                 return Response(data, status=status.HTTP_400_BAD_REQUEST)
 
@@ -105,13 +143,59 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer = ShortRecipeSerializer(recipe, context=context)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        obj = model.objects.filter(user=request.user, recipe=recipe).first()
-        if not obj:
+        # DELETE ... RETURNING: счётчики сдвигаются, только если строку
+        # удалил этот запрос, а не параллельный.
+        with transaction.atomic():
+            removed = delete_rows(
+                model.objects.filter(user=request.user, recipe=recipe),
+                returning='recipe'
+            )
+            shift_relation_counters(model, request.user, removed, -1)
+        if not removed:
             data = {"errors": f"Рецепт «{recipe.name}» не найден {label}."}
             return Response(data, status=status.HTTP_400_BAD_REQUEST)
-        obj.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def _bulk_post_delete_action(self, request, model):
+        """
+        Добавляет или удаляет сразу несколько рецептов одним запросом
+        к таблице связи и возвращает результат по каждому id.
+        """
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data['recipes']))
+        user = request.user
+
+        # Изменения берутся из RETURNING самих INSERT и DELETE, а не из
+        # предварительной выборки: параллельный запрос того же
+        # пользователя не приведёт к двойному сдвигу счётчиков.
+        with transaction.atomic():
+            if request.method == 'POST':
+                found = list(Recipe.objects.filter(
+                    pk__in=ids
+                ).values_list('pk', flat=True))
+                changed = insert_rows(
+                    (model(user=user, recipe_id=pk) for pk in found),
+                    returning='recipe'
+                )
+                statuses = {pk: 'exists' for pk in found}
+                statuses.update((pk, 'added') for pk in changed)
+                delta = 1
+            else:
+                changed = delete_rows(
+                    model.objects.filter(user=user, recipe_id__in=ids),
+                    returning='recipe'
+                )
+                statuses = {pk: 'removed' for pk in changed}
+                delta = -1
+
+            shift_relation_counters(model, user, changed, delta)
+
+        return Response({'results': [
+            {'id': pk, 'status': statuses.get(pk, 'not_found')}
+            for pk in ids
+        ]})
+
     @action(detail=True, methods=['post', 'delete'])
     def favorite(self, request, pk=None):
         recipe = self.get_object()
@@ -122,38 +206,59 @@ class RecipeViewSet(viewsets.ModelViewSet):
         recipe = self.get_object()
         return self._post_delete_action(request, recipe, ShoppingCart)
 
-    @action(detail=False, methods=['get'])
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='favorite',
+        url_name='favorite-bulk'
+    )
+    def favorite_bulk(self, request):
+        return self._bulk_post_delete_action(request, Favorite)
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='shopping_cart',
+        url_name='shopping-cart-bulk'
+    )
+    def shopping_cart_bulk(self, request):
+        return self._bulk_post_delete_action(request, ShoppingCart)
+
+    def _get_servings(self, request):
+        params = ShoppingListParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return params.validated_data.get('servings')
+
+    @action(detail=False, methods=['get'], url_path='shopping_list')
+    def shopping_list(self, request):
+        """
+        Список покупок в JSON с переводом единиц,
+        `?servings=` масштабирует его по порциям.
+        """
+        items = get_cart_ingredients(
+            request.user, self._get_servings(request)
+        )
+        serializer = ShoppingListItemSerializer(items, many=True)
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        renderer_classes=[ShoppingListTextRenderer, ShoppingListCSVRenderer]
+    )
     def download_shopping_cart(self, request):
-        user = request.user
-        ingredients = RecipeIngredient.objects.filter(
-            recipe__in_shopping_cart__user=user
-        ).values(
-            'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(total=Sum('amount')).order_by('ingredient__name')
-
-        recipes = Recipe.objects.filter(in_shopping_cart__user=user)
-
-        timestamp = datetime.now().strftime("%d.%m.%Y %H:%M")
-        lines = [f'Список покупок — {timestamp}', '']
-
-        for i, item in enumerate(ingredients, start=1):
-            name = item["ingredient__name"].capitalize()
-            unit = item["ingredient__measurement_unit"]
-            amount = item["total"]
-            lines.append(f"{i}. {name} ({unit}) — {amount}")
-
-        lines.extend(['', 'Рецепты в списке покупок:', ''])
-        for recipe in recipes:
-            author = recipe.author.get_full_name() or recipe.author.username
-            lines.append(f'— {recipe.name} (автор: {author})')
-
-        content = '\n'.join(lines)
-        return FileResponse(
-            content,
-            as_attachment=True,
-            filename='shopping_list.txt',
-            content_type='text/plain'
+        """
+        Отдаёт список покупок потоком в формате из `?format=txt|csv`.
+        """
+        renderer = request.accepted_renderer
+        servings = self._get_servings(request)
+        filename = f'shopping_list.{renderer.format}'
+        return StreamingHttpResponse(
+            stream_shopping_list(request.user, renderer.format, servings),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+            headers={
+                'Content-Disposition': f'attachment; filename="{filename}"'
+            }
         )
 
     @action(detail=True, methods=['get'], url_path='get-link')
@@ -1,22 +1,29 @@
-import base64
-
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
 from django.shortcuts import get_object_or_404
-from rest_framework import viewsets, status
+from rest_framework import serializers, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from drf_extra_fields.fields import Base64ImageField
 from django.contrib.auth import get_user_model
-from django.db.models import Count
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
 from djoser.serializers import UserCreateSerializer, SetPasswordSerializer
 
 from api.serializers.users import (
     UserSerializer,
-    SubscriptionUserSerializer
+    SubscriptionUserSerializer,
+    get_recipes_limit
+)
+from api.pagination import FeedPagination
+from recipes.fields import (
+    content_hashed_name, random_name, validate_image
 )
-from api.pagination import CustomPagination
-from recipes.models import Subscription
+from recipes.models import Recipe, Subscription
 
 User = get_user_model()
 
@@ -25,7 +32,8 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all().order_by('id')
     serializer_class = UserSerializer
     permission_classes = [AllowAny]
-    pagination_class = CustomPagination
+    pagination_class = FeedPagination
+    cursor_ordering = ('id',)
     parser_classes = (MultiPartParser, FormParser, JSONParser)
 
     def get_serializer_class(self):
@@ -43,42 +51,71 @@ class UserViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def me(self, request):
-        serializer = self.get_serializer(request.user)
+        # request.user может прийти из кеша токенов: профиль читаем из БД.
+        serializer = self.get_serializer(
+            self.get_queryset().get(pk=request.user.pk)
+        )
         return Response(serializer.data)
 
-    def _avatar_update(self, user, avatar_data):
+    def _decode_avatar(self, avatar_data):
+        """
+        Файл из multipart-запроса проверяется как есть, строка
+        декодируется из Base64.
+        """
+        if isinstance(avatar_data, UploadedFile):
+            validate_image(avatar_data)
+            return serializers.ImageField().to_internal_value(avatar_data)
+        return Base64ImageField().to_internal_value(avatar_data)
+
+    def _store_avatar(self, user, avatar):
+        if not settings.AVATAR_CONTENT_HASH_NAMES:
+            user.avatar.save(random_name(avatar), avatar, save=False)
+            user.save(update_fields=['avatar'])
+            return
+        # Префикс пользователя: удаление аватара не задевает чужие файлы.
+        name = f'{user.pk}_{content_hashed_name(avatar)}'
+        path = user.avatar.field.generate_filename(user, name)
+        if user.avatar.storage.exists(path):
+            # Такое содержимое уже загружалось — переиспользуем файл.
+            user.avatar.name = path
+        else:
+            user.avatar.save(name, avatar, save=False)
+        # Только изменённое поле: остальные в request.user могут устареть.
+        user.save(update_fields=['avatar'])
+
+    def _avatar_update(self, request, user, avatar_data):
         try:
-            user.avatar = Base64ImageField().to_internal_value(avatar_data)
-            user.save()
-
-            with user.avatar.open("rb") as f:
-                encoded = base64.b64encode(f.read()).decode('utf-8')
-                ext = user.avatar.name.split('.')[-1]
-                mime = f"image/{ext if ext != 'jpg' else 'jpeg'}"
-                avatar_response = f"data:{mime};base64,{encoded}"
-
-            return Response({'avatar': avatar_response})
-        except Exception:
+            avatar = self._decode_avatar(avatar_data)
+        except (serializers.ValidationError, DjangoValidationError):
             return Response(
                 {'error': 'Невалидный формат изображения'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        self._store_avatar(user, avatar)
+        return Response({
+            'avatar': request.build_absolute_uri(user.avatar.url)
+        })
 
     @action(detail=False, methods=['put', 'delete'], url_path='me/avatar')
     def avatar(self, request):
         user = request.user
 
         if request.method == 'PUT':
+            # Multipart-файл пишется на диск частями, а не в память.
+            request._request.upload_handlers = [
+                TemporaryFileUploadHandler(request._request)
+            ]
             avatar_data = request.data.get('avatar')
             if not avatar_data:
                 return Response(
                     {'error': 'Аватар не был передан'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            return self._avatar_update(user, avatar_data)
+            return self._avatar_update(request, user, avatar_data)
 
         elif request.method == 'DELETE':
-            user.avatar.delete(save=True)
+            user.avatar.delete(save=False)
+            user.save(update_fields=['avatar'])
             return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=['post', 'delete'])
@@ -117,12 +154,38 @@ class UserViewSet(viewsets.ModelViewSet):
         Subscription.objects.filter(user=user, author=author).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def _limited_recipes(self, request):
+        """
+        Первые `recipes_limit` рецептов каждого автора одним запросом
+        с ROW_NUMBER() OVER (PARTITION BY author_id).
+        """
+        recipes = Recipe.objects.only(
+            'id', 'name', 'image', 'image_variants', 'cooking_time',
+            'author_id', 'pub_date'
+        )
+        recipes_limit = get_recipes_limit(request)
+        if recipes_limit is None:
+            return recipes
+        return recipes.annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=F('author_id'),
+                order_by=(F('pub_date').desc(), F('id').desc())
+            )
+        ).filter(row_number__lte=recipes_limit)
+
     @action(detail=False, methods=['get'])
     def subscriptions(self, request):
         user = request.user
-        subscriptions = User.objects.filter(subscribers__user=user).annotate(
-            recipes_count=Count('recipes')
-        )
+        subscriptions = User.objects.filter(
+            subscribers__user=user
+        ).prefetch_related(
+            Prefetch(
+                'recipes',
+                queryset=self._limited_recipes(request),
+                to_attr='short_recipes'
+            )
+        ).order_by('id')
         page = self.paginate_queryset(subscriptions)
         serializer = SubscriptionUserSerializer(
             page, many=True, context={'request': request}
@@ -136,5 +199,5 @@ class UserViewSet(viewsets.ModelViewSet):
         )
         serializer.is_valid(raise_exception=True)
         request.user.set_password(serializer.validated_data['new_password'])
-        request.user.save()
+        request.user.save(update_fields=['password'])
         return Response(status=status.HTTP_204_NO_CONTENT)
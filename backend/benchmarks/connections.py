@@ -0,0 +1,138 @@
+import copy
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import requests
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connection
+
+from benchmarks.runner import percentile
+
+# Стратегия подключения -> переменные окружения из settings.py.
+STRATEGIES = {
+    'new': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '0'},
+    'persistent': {
+        'DB_POOL': 'False',
+        'DB_CONN_MAX_AGE': '600',
+        'DB_CONN_HEALTH_CHECKS': 'True',
+    },
+    'pool': {'DB_POOL': 'True'},
+}
+PROFILES = ('sync', 'gthread', 'uvicorn')
+START_TIMEOUT = 30
+
+
+def pool_available():
+    """Встроенный пул Django есть только у PostgreSQL с psycopg 3."""
+    if connection.vendor != 'postgresql':
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    return is_psycopg3
+
+
+def _database_settings(strategy):
+    env = STRATEGIES[strategy]
+    options = dict(connection.settings_dict['OPTIONS'])
+    options.pop('pool', None)
+    if env['DB_POOL'] == 'True':
+        options['pool'] = settings.DATABASE_POOL
+    return {
+        'CONN_MAX_AGE': int(env.get('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': env.get('DB_CONN_HEALTH_CHECKS') == 'True',
+        'OPTIONS': options,
+    }
+
+
+def _close():
+    connection.close()
+    if hasattr(connection, 'close_pool'):
+        connection.close_pool()
+
+
+@contextmanager
+def use_strategy(strategy):
+    """Временно подключается к БД по стратегии в текущем процессе."""
+    original = copy.deepcopy(connection.settings_dict)
+    _close()
+    connection.settings_dict.update(_database_settings(strategy))
+    try:
+        yield
+    finally:
+        _close()
+        connection.settings_dict.clear()
+        connection.settings_dict.update(original)
+
+
+def request_cycles(iterations):
+    """
+    Повторяет жизненный цикл запроса: сигналы начала и конца запроса,
+    которыми Django закрывает или возвращает соединение, и один SQL-запрос
+    между ними. Возвращает время циклов и число различных соединений.
+    """
+    timings = []
+    # Ссылки держатся до конца замера, чтобы id не повторялись.
+    connections = {}
+    for _ in range(iterations):
+        start = time.perf_counter()
+        request_started.send(sender=__name__)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        connections[id(connection.connection)] = connection.connection
+        request_finished.send(sender=__name__)
+        timings.append(time.perf_counter() - start)
+    return timings, len(connections)
+
+
+def summarize_cycles(timings, connections):
+    return {
+        'iterations': len(timings),
+        'p50_ms': percentile(timings, 0.5) * 1000,
+        'p95_ms': percentile(timings, 0.95) * 1000,
+        'max_ms': max(timings) * 1000,
+        'connections': connections,
+    }
+
+
+@contextmanager
+def serve(profile, port, workers, env=None):
+    """
+    Запускает gunicorn с профилем и дополнительными переменными
+    окружения и отдаёт адрес сервера, когда тот начнёт отвечать.
+    """
+    base_url = f'http://127.0.0.1:{port}'
+    env = {
+        **os.environ,
+        **(env or {}),
+        'GUNICORN_PROFILE': profile,
+        'GUNICORN_BIND': f'127.0.0.1:{port}',
+        'GUNICORN_WORKERS': str(workers),
+    }
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py'],
+        cwd=settings.BASE_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    try:
+        deadline = time.monotonic() + START_TIMEOUT
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(
+                    f'gunicorn ({profile}) завершился: '
+                    f'{process.stderr.read().decode()[-2000:]}'
+                )
+            try:
+                requests.get(base_url + '/health', timeout=1)
+                break
+            except requests.RequestException:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f'gunicorn ({profile}) не запустился')
+                time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=START_TIMEOUT)
+        process.stderr.close()
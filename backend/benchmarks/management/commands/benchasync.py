@@ -0,0 +1,87 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.connections import serve
+from benchmarks.runner import HttpClient, run_scenario
+from benchmarks.scenarios import auth_tokens, build_scenarios
+
+# Вариант сервера -> (профиль gunicorn, переменные окружения).
+VARIANTS = {
+    'sync': ('sync', {'ASYNC_VIEWS': 'False'}),
+    'gthread': ('gthread', {'ASYNC_VIEWS': 'False'}),
+    'asgi': ('uvicorn', {'ASYNC_VIEWS': 'False'}),
+    'asgi-async': ('uvicorn', {'ASYNC_VIEWS': 'True'}),
+}
+SCENARIOS = (
+    'health', 'recipes_list', 'recipe_detail', 'ingredient_autocomplete'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность синхронных и асинхронных '
+        'представлений при большом числе параллельных запросов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=64)
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Воркеров gunicorn в каждом варианте'
+        )
+        parser.add_argument(
+            '--variant', action='append', choices=VARIANTS, default=[],
+            help='Варианты сервера; по умолчанию все'
+        )
+        parser.add_argument(
+            '--scenario', action='append', default=[],
+            help=f'Сценарии runbench; по умолчанию {", ".join(SCENARIOS)}'
+        )
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        tokens = auth_tokens()
+        if tokens is None:
+            raise CommandError('Нет данных бенчмарка: запустите seedbench.')
+        names = options['scenario'] or SCENARIOS
+        scenarios = {
+            scenario.name: scenario for scenario in build_scenarios()
+            if scenario.name in names and not scenario.in_process_only
+        }
+        unknown = set(names) - scenarios.keys()
+        if unknown:
+            raise CommandError(
+                f'Сценарии недоступны по HTTP: {", ".join(sorted(unknown))}'
+            )
+        self.stdout.write(
+            f'Воркеров: {options["workers"]}, '
+            f'параллельно: {options["concurrency"]}'
+        )
+        for variant in options['variant'] or VARIANTS:
+            profile, env = VARIANTS[variant]
+            try:
+                with serve(profile, options['port'], options['workers'],
+                           env) as base_url:
+                    clients = {
+                        auth: HttpClient(
+                            base_url, token, options['concurrency']
+                        )
+                        for auth, token in tokens.items()
+                    }
+                    for name in names:
+                        summary = run_scenario(
+                            scenarios[name], clients, options['iterations'],
+                            warmup=options['workers'] * 2,
+                            concurrency=options['concurrency'],
+                        )
+                        self.report(f'{variant}/{name}', summary)
+            except RuntimeError as error:
+                raise CommandError(str(error))
+
+    def report(self, name, summary):
+        self.stdout.write(
+            f'{name}: {summary["statuses"]} '
+            f'rps={summary["throughput_rps"]:.1f} '
+            f'p50_ms={summary["p50_ms"]:.2f} '
+            f'p95_ms={summary["p95_ms"]:.2f}'
+        )
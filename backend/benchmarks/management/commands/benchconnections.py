@@ -0,0 +1,99 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.connections import (
+    PROFILES, STRATEGIES, pool_available, request_cycles, serve,
+    summarize_cycles, use_strategy
+)
+from benchmarks.runner import HttpClient, run_scenario
+from benchmarks.scenarios import auth_tokens, build_scenarios
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает стоимость подключения к БД при разных стратегиях '
+        'соединений и профилях gunicorn'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument(
+            '--strategy', action='append', choices=STRATEGIES, default=[],
+            help='Стратегии подключения; по умолчанию все доступные'
+        )
+        parser.add_argument(
+            '--profile', action='append', choices=PROFILES, default=[],
+            help='Запустить gunicorn с профилем и замерить запросы по HTTP'
+        )
+        parser.add_argument(
+            '--scenario', default='recipe_detail',
+            help='Сценарий runbench для замеров по HTTP'
+        )
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--port', type=int, default=8765)
+
+    def get_strategies(self, options):
+        strategies = options['strategy'] or list(STRATEGIES)
+        if 'pool' in strategies and not pool_available():
+            if options['strategy']:
+                raise CommandError('Пул доступен только с psycopg 3.')
+            strategies.remove('pool')
+        return strategies
+
+    def handle(self, *args, **options):
+        strategies = self.get_strategies(options)
+        self.stdout.write('Цикл запроса в процессе:')
+        for strategy in strategies:
+            with use_strategy(strategy):
+                summary = summarize_cycles(
+                    *request_cycles(options['iterations'])
+                )
+            self.report(strategy, summary)
+
+        if not options['profile']:
+            return
+        tokens = auth_tokens()
+        if tokens is None:
+            raise CommandError('Нет данных бенчмарка: запустите seedbench.')
+        scenario = {
+            scenario.name: scenario for scenario in build_scenarios()
+        }.get(options['scenario'])
+        if scenario is None or scenario.in_process_only:
+            raise CommandError(
+                f'Сценарий недоступен по HTTP: {options["scenario"]}'
+            )
+        self.stdout.write(
+            f'{scenario.name} по HTTP, '
+            f'параллельно {options["concurrency"]}:'
+        )
+        for profile in options['profile']:
+            for strategy in strategies:
+                try:
+                    with serve(profile, options['port'], options['workers'],
+                               STRATEGIES[strategy]) as base_url:
+                        clients = {
+                            auth: HttpClient(base_url, token)
+                            for auth, token in tokens.items()
+                        }
+                        summary = run_scenario(
+                            scenario, clients, options['iterations'],
+                            warmup=options['workers'] * 2,
+                            concurrency=options['concurrency'],
+                        )
+                except RuntimeError as error:
+                    raise CommandError(str(error))
+                self.report(f'{profile}/{strategy}', summary)
+
+    def report(self, name, summary):
+        parts = [
+            f'{name}:',
+            f'p50_ms={summary["p50_ms"]:.2f}',
+            f'p95_ms={summary["p95_ms"]:.2f}',
+        ]
+        if 'connections' in summary:
+            parts.append(f'connections={summary["connections"]}')
+        if 'statuses' in summary:
+            parts.append(f'statuses={summary["statuses"]}')
+        if summary.get('throughput_rps'):
+            parts.append(f'rps={summary["throughput_rps"]:.1f}')
+        self.stdout.write(' '.join(parts))
@@ -0,0 +1,144 @@
+import json
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks.runner import HttpClient, InProcessClient, run_scenario
+from benchmarks.scenarios import ANON, auth_tokens, build_scenarios
+from recipes.models import Recipe
+
+COMPARED = ('p50_ms', 'p95_ms', 'queries', 'peak_memory')
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _delta(current, baseline):
+    if not baseline:
+        return ''
+    return f' ({(current - baseline) / baseline:+.1%})'
+
+
+class Command(BaseCommand):
+    help = 'Замеряет ключевые запросы API на данных seedbench'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--concurrency', type=int, default=1,
+            help='Параллельных запросов; только вместе с --base-url'
+        )
+        parser.add_argument(
+            '--base-url',
+            help='Адрес запущенного сервера, например http://localhost:8000'
+        )
+        parser.add_argument(
+            '--scenario', action='append', default=[],
+            help='Запустить только указанные сценарии'
+        )
+        parser.add_argument(
+            '--trace-memory', action='store_true',
+            help='Замерять пик памяти через tracemalloc'
+        )
+        parser.add_argument('--output', help='Сохранить результаты в JSON')
+        parser.add_argument(
+            '--compare', help='JSON прошлого прогона для сравнения'
+        )
+
+    def get_clients(self, options):
+        users = auth_tokens()
+        if users is None:
+            raise CommandError('Нет данных бенчмарка: запустите seedbench.')
+        if options['base_url']:
+            return {
+                auth: HttpClient(options['base_url'], token)
+                for auth, token in users.items()
+            }
+        if options['concurrency'] > 1:
+            raise CommandError(
+                'Параллельный режим доступен только с --base-url.'
+            )
+        return {
+            auth: InProcessClient(token, options['trace_memory'])
+            for auth, token in users.items()
+        }
+
+    def handle(self, *args, **options):
+        clients = self.get_clients(options)
+        scenarios = build_scenarios()
+        if options['scenario']:
+            unknown = set(options['scenario']) - {
+                scenario.name for scenario in scenarios
+            }
+            if unknown:
+                raise CommandError(
+                    f'Неизвестные сценарии: {", ".join(sorted(unknown))}'
+                )
+            scenarios = [
+                scenario for scenario in scenarios
+                if scenario.name in options['scenario']
+            ]
+        if options['base_url']:
+            scenarios = [
+                scenario for scenario in scenarios
+                if not scenario.in_process_only
+            ]
+        baseline = {}
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                baseline = json.load(file)['scenarios']
+
+        results = {}
+        for scenario in scenarios:
+            summary = run_scenario(
+                scenario, clients, options['iterations'],
+                warmup=options['warmup'],
+                concurrency=options['concurrency'],
+            )
+            results[scenario.name] = summary
+            self.report(scenario.name, summary, baseline.get(scenario.name))
+
+        if options['output']:
+            report = {
+                'meta': {
+                    'commit': git_commit(),
+                    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                    'database': connection.vendor,
+                    'mode': clients[ANON].mode,
+                    'recipes': Recipe.objects.count(),
+                    'iterations': options['iterations'],
+                    'concurrency': options['concurrency'],
+                },
+                'scenarios': results,
+            }
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(
+                self.style.SUCCESS(f'Результаты: {options["output"]}')
+            )
+
+    def report(self, name, summary, baseline):
+        baseline = baseline or {}
+        parts = [f'{name}: {summary["statuses"]}']
+        for field in COMPARED:
+            if field not in summary:
+                continue
+            value = summary[field]
+            shown = f'{value:.2f}' if isinstance(value, float) else value
+            parts.append(
+                f'{field}={shown}{_delta(value, baseline.get(field))}'
+            )
+        if summary.get('file_opens'):
+            parts.append(f'file_opens={summary["file_opens"]}')
+        self.stdout.write(' '.join(parts))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from benchmarks.seed import reset, seed
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу синтетическими данными для бенчмарков'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Избранных рецептов на пользователя'
+        )
+        parser.add_argument(
+            '--cart', type=int, default=10,
+            help='Рецептов в корзине на пользователя'
+        )
+        parser.add_argument(
+            '--subscriptions', type=int, default=10,
+            help='Подписок на пользователя'
+        )
+        parser.add_argument(
+            '--heavy-cart', type=int, default=500,
+            help='Рецептов в корзине пользователя bench-heavy'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Только удалить данные бенчмарков'
+        )
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            with transaction.atomic():
+                reset()
+            self.stdout.write(self.style.SUCCESS('Данные удалены.'))
+            return
+        if options['users'] < 2:
+            raise CommandError('Нужно хотя бы два пользователя.')
+        try:
+            counts = seed(
+                users=options['users'],
+                recipes=options['recipes'],
+                favorites=options['favorites'],
+                cart=options['cart'],
+                subscriptions=options['subscriptions'],
+                heavy_cart=options['heavy_cart'],
+                random_seed=options['seed'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        for name, value in counts.items():
+            self.stdout.write(f'{name}: {value}')
+        self.stdout.write(self.style.SUCCESS('Данные созданы.'))
@@ -0,0 +1,165 @@
+import builtins
+import json
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import requests
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+
+class Result:
+    """Ответ клиента бенчмарка: код, тело и метрики одного запроса."""
+
+    def __init__(self, status, body, queries=None, file_opens=None,
+                 peak_memory=None):
+        self.status = status
+        self.body = body
+        self.queries = queries
+        self.file_opens = file_opens
+        self.peak_memory = peak_memory
+
+    def json(self):
+        return json.loads(self.body)
+
+
+@contextmanager
+def count_media_opens():
+    """Считает открытия файлов из MEDIA_ROOT во время запроса."""
+    opened = []
+    real_open = builtins.open
+    media_root = str(settings.MEDIA_ROOT)
+
+    def spy(file, *args, **kwargs):
+        if str(file).startswith(media_root):
+            opened.append(file)
+        return real_open(file, *args, **kwargs)
+
+    builtins.open = spy
+    try:
+        yield opened
+    finally:
+        builtins.open = real_open
+
+
+class InProcessClient:
+    """Запросы через тестовый клиент Django в текущем процессе."""
+
+    mode = 'in-process'
+
+    def __init__(self, token=None, trace_memory=False):
+        headers = {'HTTP_HOST': 'localhost'}
+        if token:
+            headers['HTTP_AUTHORIZATION'] = f'Token {token}'
+        self.client = Client(**headers)
+        self.trace_memory = trace_memory
+
+    def request(self, method, url, data=None):
+        if self.trace_memory:
+            tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries, \
+                count_media_opens() as opened:
+            response = getattr(self.client, method)(
+                url, data=data, content_type='application/json'
+            )
+            if response.streaming:
+                body = b''.join(response.streaming_content)
+            else:
+                body = response.content
+            response.close()
+        peak = None
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return Result(
+            response.status_code, body, len(queries), len(opened), peak
+        )
+
+
+class HttpClient:
+    """Запросы к запущенному серверу по HTTP."""
+
+    mode = 'http'
+
+    def __init__(self, base_url, token=None, pool_size=10):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        # По соединению на параллельный запрос, без переподключений.
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if token:
+            self.session.headers['Authorization'] = f'Token {token}'
+
+    def request(self, method, url, data=None):
+        response = self.session.request(
+            method, self.base_url + url, json=data
+        )
+        return Result(response.status_code, response.content)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(timings, results):
+    """Статистика прогона сценария, время в миллисекундах."""
+    total = sum(timings)
+    summary = {
+        'iterations': len(timings),
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'p50_ms': percentile(timings, 0.5) * 1000,
+        'p95_ms': percentile(timings, 0.95) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'min_ms': min(timings) * 1000,
+        'max_ms': max(timings) * 1000,
+        'statuses': sorted({result.status for result in results}),
+        'bytes': len(results[-1].body),
+    }
+    for field in ('queries', 'file_opens', 'peak_memory'):
+        values = [
+            getattr(result, field) for result in results
+            if getattr(result, field) is not None
+        ]
+        if values:
+            summary[field] = max(values)
+    summary['throughput_rps'] = len(timings) / total if total else None
+    return summary
+
+
+def run_scenario(scenario, clients, iterations, warmup=1, concurrency=1):
+    """
+    Прогоняет сценарий: `warmup` запросов без замера, затем
+    `iterations` замеренных, при concurrency > 1 — параллельно.
+    """
+    client = clients[scenario.auth]
+    state = scenario.prepare(client)
+    for _ in range(warmup):
+        scenario.run(client, state)
+
+    def timed(_):
+        start = time.perf_counter()
+        result = scenario.run(client, state)
+        return time.perf_counter() - start, result
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            measured = list(pool.map(timed, range(iterations)))
+    else:
+        measured = [timed(i) for i in range(iterations)]
+    wall = time.perf_counter() - started
+
+    timings = [duration for duration, _ in measured]
+    summary = summarize(timings, [result for _, result in measured])
+    summary['concurrency'] = concurrency
+    if concurrency > 1:
+        summary['throughput_rps'] = iterations / wall
+    return summary
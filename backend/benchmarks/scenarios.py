@@ -0,0 +1,278 @@
+import random
+from collections import defaultdict
+from itertools import count
+from urllib.parse import urlsplit
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from api.authentication import CachedTokenAuthentication
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from recipes.units import UNIT_CONVERSIONS, aggregate
+from users.models import User
+
+from benchmarks.runner import Result
+from benchmarks.seed import EMAIL_DOMAIN, HEAVY_USER, IMAGE_NAME, MAIN_USER
+
+ANON, MAIN, HEAVY = 'anon', 'main', 'heavy'
+AUTOCOMPLETE_PREFIXES = ('м', 'мо', 'мол', 'с', 'са', 'сах', 'к', 'кар')
+DEEP_PAGE = 500
+PAGE_SIZE = 6
+AGGREGATE_ROWS = 100000
+
+
+def auth_tokens():
+    """
+    Токены для видов авторизации сценариев или None,
+    если данных seedbench нет.
+    """
+    tokens = dict(Token.objects.filter(
+        user__email__in=(MAIN_USER, HEAVY_USER)
+    ).values_list('user__email', 'key'))
+    if len(tokens) < 2:
+        return None
+    return {ANON: None, MAIN: tokens[MAIN_USER], HEAVY: tokens[HEAVY_USER]}
+
+
+def _path(url):
+    parts = urlsplit(url)
+    return f'{parts.path}?{parts.query}' if parts.query else parts.path
+
+
+class Scenario:
+    """
+    Сценарий бенчмарка: `prepare` готовит состояние без замера,
+    `run` выполняет один замеряемый запрос.
+    """
+    in_process_only = False
+
+    def __init__(self, name, auth, url=None, method='get', data=None):
+        self.name = name
+        self.auth = auth
+        self.url = url
+        self.method = method
+        self.data = data
+
+    def prepare(self, client):
+        return None
+
+    def run(self, client, state):
+        return client.request(self.method, self.url, self.data)
+
+
+class RotatingScenario(Scenario):
+    """Перебирает список адресов, чтобы не попадать в одни и те же ключи."""
+
+    def __init__(self, name, auth, urls):
+        super().__init__(name, auth)
+        self.urls = urls
+
+    def prepare(self, client):
+        return count()
+
+    def run(self, client, state):
+        url = self.urls[next(state) % len(self.urls)]
+        return client.request('get', url)
+
+
+class CursorPageScenario(Scenario):
+    """Страница DEEP_PAGE ленты в курсорном режиме."""
+
+    def prepare(self, client):
+        url = f'/api/recipes/?pagination=cursor&limit={PAGE_SIZE}'
+        for _ in range(DEEP_PAGE - 1):
+            next_url = client.request('get', url).json().get('next')
+            if not next_url:
+                break
+            url = _path(next_url)
+        return url
+
+    def run(self, client, url):
+        return client.request('get', url)
+
+
+class RecipeEditScenario(Scenario):
+    """PATCH рецепта с 40 ингредиентами: меняются 5 позиций и количества."""
+
+    size = 40
+    swapped = 5
+
+    def prepare(self, client):
+        author = User.objects.get(email=MAIN_USER)
+        ingredient_ids = list(Ingredient.objects.values_list(
+            'id', flat=True
+        )[:self.size + self.swapped])
+        recipe, _ = Recipe.objects.get_or_create(
+            author=author,
+            name='Бенч: редактирование',
+            defaults={
+                'text': 'Рецепт для замера редактирования.',
+                'cooking_time': 10,
+                'image': IMAGE_NAME,
+            }
+        )
+        RecipeIngredient.objects.filter(recipe=recipe).delete()
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient_id=pk, amount=1)
+            for pk in ingredient_ids[:self.size]
+        )
+        variants = []
+        for shift in (0, self.swapped):
+            variants.append([
+                {'id': pk, 'amount': shift + 1}
+                for pk in ingredient_ids[shift:shift + self.size]
+            ])
+        return {'url': f'/api/recipes/{recipe.pk}/', 'variants': variants,
+                'step': count()}
+
+    def run(self, client, state):
+        variant = state['variants'][next(state['step']) % 2]
+        return client.request(
+            'patch', state['url'], {'ingredients': variant}
+        )
+
+
+class CallableScenario(Scenario):
+    """
+    Замер функции без HTTP, например индекса против ORM.
+    Аргументы перебираются по кругу; вместо списка можно передать
+    функцию, которая построит его в prepare.
+    """
+
+    in_process_only = True
+
+    def __init__(self, name, func, arguments=AUTOCOMPLETE_PREFIXES):
+        super().__init__(name, ANON)
+        self.func = func
+        self.arguments = arguments
+
+    def prepare(self, client):
+        arguments = self.arguments
+        if callable(arguments):
+            arguments = arguments()
+        return arguments, count()
+
+    def run(self, client, state):
+        arguments, step = state
+        items = self.func(arguments[next(step) % len(arguments)])
+        return Result(200, str(len(items)).encode())
+
+
+def _cart_rows(size=AGGREGATE_ROWS, ingredients=2000):
+    """Синтетическая большая корзина: id, количества и справочник."""
+    rng = random.Random(0)
+    units = ('г', 'кг', 'мл', 'л', 'шт.', 'ч. л.', 'ст. л.')
+    catalog = {
+        pk: (f'ингредиент {pk // 2}', rng.choice(units))
+        for pk in range(ingredients)
+    }
+    return [(
+        [rng.randrange(ingredients) for _ in range(size)],
+        [rng.randint(1, 500) for _ in range(size)],
+        catalog,
+    )]
+
+
+def _numpy_aggregate(rows):
+    return aggregate(*rows)
+
+
+def _python_aggregate(rows):
+    """Построчный цикл для сравнения с векторной агрегацией."""
+    ingredient_ids, amounts, catalog = rows
+    totals = defaultdict(int)
+    for pk, amount in zip(ingredient_ids, amounts):
+        name, unit = catalog[pk]
+        base, ratio = UNIT_CONVERSIONS.get(unit, (unit, 1))
+        totals[name, base] += amount * ratio
+    return sorted(totals.items())
+
+
+def _main_token():
+    return [Token.objects.get(user__email=MAIN_USER).key]
+
+
+def _authenticate_db(key):
+    return TokenAuthentication().authenticate_credentials(key)
+
+
+def _authenticate_cached(key):
+    return CachedTokenAuthentication().authenticate_credentials(key)
+
+
+def _orm_prefix(prefix):
+    return list(Ingredient.objects.filter(name__istartswith=prefix))
+
+
+def build_scenarios():
+    author_id = Recipe.objects.filter(
+        author__email__endswith=f'@{EMAIL_DOMAIN}'
+    ).values_list('author_id', flat=True).first()
+    recipe_id = Recipe.objects.filter(
+        author__email__endswith=f'@{EMAIL_DOMAIN}'
+    ).values_list('id', flat=True).first()
+    autocomplete = [
+        f'/api/ingredients/?name={prefix}'
+        for prefix in AUTOCOMPLETE_PREFIXES
+    ]
+    return [
+        Scenario('health', ANON, '/health'),
+        Scenario('recipes_list_anon', ANON, '/api/recipes/'),
+        Scenario('recipes_list', MAIN, '/api/recipes/'),
+        Scenario('recipes_list_limit_100', MAIN, '/api/recipes/?limit=100'),
+        Scenario(
+            'recipes_list_author', MAIN, f'/api/recipes/?author={author_id}'
+        ),
+        Scenario(
+            'recipes_list_favorited', MAIN, '/api/recipes/?is_favorited=1'
+        ),
+        Scenario(
+            'recipes_list_in_cart', MAIN,
+            '/api/recipes/?is_in_shopping_cart=1'
+        ),
+        Scenario(
+            'recipes_page_500_page_number', MAIN,
+            f'/api/recipes/?page={DEEP_PAGE}&limit={PAGE_SIZE}'
+        ),
+        CursorPageScenario('recipes_page_500_cursor', MAIN),
+        Scenario('recipe_detail_anon', ANON, f'/api/recipes/{recipe_id}/'),
+        Scenario('recipe_detail', MAIN, f'/api/recipes/{recipe_id}/'),
+        RotatingScenario('ingredient_autocomplete', MAIN, autocomplete),
+        Scenario(
+            'ingredient_ranked_search', MAIN,
+            '/api/ingredients/?name=молоко&ranked=1'
+        ),
+        CallableScenario(
+            'ingredient_prefix_index', ingredient_index.search
+        ),
+        CallableScenario('ingredient_prefix_orm', _orm_prefix),
+        CallableScenario('token_auth_db', _authenticate_db, _main_token),
+        CallableScenario(
+            'token_auth_cached', _authenticate_cached, _main_token
+        ),
+        CallableScenario(
+            'unit_aggregate_numpy', _numpy_aggregate, _cart_rows
+        ),
+        CallableScenario(
+            'unit_aggregate_python', _python_aggregate, _cart_rows
+        ),
+        Scenario(
+            'subscriptions', MAIN,
+            '/api/users/subscriptions/?recipes_limit=10'
+        ),
+        Scenario('shopping_list_json', HEAVY, '/api/recipes/shopping_list/'),
+        Scenario(
+            'shopping_list_json_servings', HEAVY,
+            '/api/recipes/shopping_list/?servings=2'
+        ),
+        Scenario(
+            'shopping_list_txt', HEAVY,
+            '/api/recipes/download_shopping_cart/?format=txt'
+        ),
+        Scenario(
+            'shopping_list_csv', HEAVY,
+            '/api/recipes/download_shopping_cart/?format=csv'
+        ),
+        RecipeEditScenario('recipe_edit_40_ingredients', MAIN),
+    ]
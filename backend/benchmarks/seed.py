@@ -0,0 +1,202 @@
+import random
+from datetime import timedelta
+from io import BytesIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from api.cache import (
+    INGREDIENTS_CACHE, RECIPES_CACHE, invalidate_cached_responses
+)
+from recipes.cart_totals import rebuild
+from recipes.counters import recount
+from recipes.ingredient_import import (
+    default_path, detect_format, import_ingredients, read_ingredients
+)
+from recipes.ingredient_index import ingredient_index
+from recipes.models import (
+    Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart,
+    Subscription
+)
+from users.models import User
+
+EMAIL_DOMAIN = 'bench.local'
+MAIN_USER = f'bench-main@{EMAIL_DOMAIN}'
+HEAVY_USER = f'bench-heavy@{EMAIL_DOMAIN}'
+PASSWORD = 'bench-password'
+IMAGE_NAME = 'recipes/bench.png'
+BATCH_SIZE = 2000
+# Количество ингредиентов в рецепте: от MIN до MAX, чаще около MODE.
+INGREDIENTS_MIN, INGREDIENTS_MODE, INGREDIENTS_MAX = 3, 8, 25
+
+
+def load_ingredients(path):
+    """Загружает справочник ингредиентов, если таблица пуста."""
+    if Ingredient.objects.exists():
+        return 0
+    with open(path, encoding='utf-8', newline='') as file:
+        _, created = import_ingredients(
+            read_ingredients(file, detect_format(path))
+        )
+    ingredient_index.invalidate()
+    return created
+
+
+def reset():
+    """Удаляет пользователей бенчмарка вместе с их данными."""
+    User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').delete()
+
+
+def _placeholder_image():
+    if not default_storage.exists(IMAGE_NAME):
+        buffer = BytesIO()
+        Image.new('RGB', (64, 64), 'orange').save(buffer, format='PNG')
+        default_storage.save(IMAGE_NAME, ContentFile(buffer.getvalue()))
+    return IMAGE_NAME
+
+
+def _ingredient_count(rng):
+    return round(rng.triangular(
+        INGREDIENTS_MIN, INGREDIENTS_MAX, INGREDIENTS_MODE
+    ))
+
+
+def _create_users(count):
+    password = make_password(PASSWORD)
+    emails = [MAIN_USER, HEAVY_USER] + [
+        f'bench-{i}@{EMAIL_DOMAIN}' for i in range(count - 2)
+    ]
+    User.objects.bulk_create(
+        (
+            User(
+                email=email,
+                username=email.split('@')[0],
+                first_name='Бенч',
+                last_name=email.split('@')[0],
+                password=password,
+            )
+            for email in emails
+        ),
+        batch_size=BATCH_SIZE
+    )
+    users = list(User.objects.filter(email__in=emails).order_by('id'))
+    # Ключ токена генерируется в save(), bulk_create его не вызывает.
+    Token.objects.bulk_create(
+        Token(user=user, key=Token.generate_key()) for user in users[:2]
+    )
+    return users
+
+
+def _create_recipes(rng, users, count):
+    image = _placeholder_image()
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                author=rng.choice(users),
+                name=f'Бенч-рецепт {i}',
+                text='Смешать все ингредиенты и готовить до готовности.',
+                cooking_time=rng.randint(5, 180),
+                image=image,
+            )
+            for i in range(count)
+        ),
+        batch_size=BATCH_SIZE
+    )
+    recipes = list(Recipe.objects.filter(
+        author__in=users
+    ).only('id').order_by('id'))
+    # auto_now_add ставит всем одну дату, разносим публикации по времени.
+    now = timezone.now()
+    for i, recipe in enumerate(recipes):
+        recipe.pub_date = now - timedelta(minutes=len(recipes) - i)
+    Recipe.objects.bulk_update(recipes, ['pub_date'], batch_size=BATCH_SIZE)
+    return [recipe.pk for recipe in recipes]
+
+
+def _create_recipe_ingredients(rng, recipe_ids, ingredient_ids):
+    def rows():
+        for recipe_id in recipe_ids:
+            for ingredient_id in rng.sample(
+                ingredient_ids, _ingredient_count(rng)
+            ):
+                yield RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=rng.randint(1, 500),
+                )
+    RecipeIngredient.objects.bulk_create(rows(), batch_size=BATCH_SIZE)
+
+
+def _create_relations(rng, model, users, targets, per_user, field):
+    def rows():
+        for user in users:
+            for target in rng.sample(targets, min(per_user, len(targets))):
+                if field == 'author_id' and target == user.pk:
+                    continue
+                yield model(user=user, **{field: target})
+    model.objects.bulk_create(
+        rows(), batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def seed(users=100, recipes=2000, favorites=20, cart=10,
+         subscriptions=10, heavy_cart=500, random_seed=0):
+    """
+    Создаёт данные бенчмарка: пользователей, рецепты с реалистичным
+    числом ингредиентов, избранное, корзины и подписки.
+    Основной пользователь `bench-main` и пользователь `bench-heavy`
+    с большой корзиной получают токены для авторизованных сценариев.
+    """
+    rng = random.Random(random_seed)
+    path = default_path()
+    if path is not None:
+        load_ingredients(path)
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    if len(ingredient_ids) < INGREDIENTS_MAX:
+        raise ValueError('Недостаточно ингредиентов для генерации рецептов.')
+
+    with transaction.atomic():
+        reset()
+        bench_users = _create_users(users)
+        recipe_ids = _create_recipes(rng, bench_users, recipes)
+        _create_recipe_ingredients(rng, recipe_ids, ingredient_ids)
+        user_ids = [user.pk for user in bench_users]
+        main, heavy = bench_users[:2]
+        _create_relations(
+            rng, Favorite, bench_users, recipe_ids, favorites, 'recipe_id'
+        )
+        _create_relations(
+            rng, ShoppingCart, [main] + bench_users[2:], recipe_ids,
+            cart, 'recipe_id'
+        )
+        _create_relations(
+            rng, ShoppingCart, [heavy], recipe_ids, heavy_cart, 'recipe_id'
+        )
+        _create_relations(
+            rng, Subscription, bench_users, user_ids,
+            subscriptions, 'author_id'
+        )
+        # bulk_create не вызывает сигналы: пересчитываем счётчики
+        # и списки покупок разом.
+        recount()
+        rebuild(user_ids)
+    invalidate_cached_responses(INGREDIENTS_CACHE, RECIPES_CACHE)
+    ingredient_index.invalidate()
+    return {
+        'users': len(bench_users),
+        'recipes': len(recipe_ids),
+        'ingredients': len(ingredient_ids),
+        'recipe_ingredients': RecipeIngredient.objects.filter(
+            recipe__author__in=bench_users
+        ).count(),
+        'favorites': Favorite.objects.filter(user__in=bench_users).count(),
+        'cart': ShoppingCart.objects.filter(user__in=bench_users).count(),
+        'subscriptions': Subscription.objects.filter(
+            user__in=bench_users
+        ).count(),
+    }
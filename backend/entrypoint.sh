@@ -10,4 +10,4 @@ python manage.py collectstatic --noinput
 python manage.py import_ingredients
 
 # Запускаем сервер
-gunicorn foodgram.wsgi:application --bind 0.0.0.0:8000
+gunicorn --config gunicorn.conf.py
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'djoser',
@@ -50,10 +51,12 @@ INSTALLED_APPS = [
     'api.apps.ApiConfig',
     'users.apps.UsersConfig',
     'recipes.apps.RecipesConfig',
+    'benchmarks.apps.BenchmarksConfig',
     'django_filters',
 ]
 
 MIDDLEWARE = [
+    'recipes.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -103,9 +106,35 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST', 'db'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', 'True'
+        ) == 'True',
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+            'DB_DISABLE_SERVER_SIDE_CURSORS', 'False'
+        ) == 'True',
+        'OPTIONS': {},
     }
 }
 
+# Подключения к PostgreSQL. По умолчанию соединение живёт между
+# запросами DB_CONN_MAX_AGE секунд и перед повторным использованием
+# проверяется (DB_CONN_HEALTH_CHECKS); 0 — новое соединение на запрос.
+# DB_POOL включает встроенный пул psycopg 3 на процесс, размером от
+# DB_POOL_MIN_SIZE до DB_POOL_MAX_SIZE соединений, с ожиданием свободного
+# не дольше DB_POOL_TIMEOUT секунд; постоянные соединения при этом
+# отключаются. За pgbouncer в режиме transaction нужен
+# DB_DISABLE_SERVER_SIDE_CURSORS: иначе команды, читающие данные
+# курсором (iterator), теряют его между транзакциями.
+DATABASE_POOL = {
+    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+}
+if os.getenv('DB_POOL', 'False') == 'True':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = DATABASE_POOL
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -129,7 +158,7 @@ CORS_ALLOW_ALL_ORIGINS = True
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -144,7 +173,68 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
+# Кеш: по умолчанию в памяти процесса. Для нескольких воркеров нужен общий
+# бэкенд, например django.core.cache.backends.redis.RedisCache (пакет redis)
+# или django.core.cache.backends.filebased.FileBasedCache.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'foodgram'),
+    }
+}
+
+# Время жизни кешированных ответов API для анонимных пользователей
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', 60))
+
+# Запросы дольше порога (в секундах) пишутся в лог foodgram.slow_requests
+SLOW_REQUEST_THRESHOLD = float(os.getenv('SLOW_REQUEST_THRESHOLD', 1.0))
+
+# Адрес /metrics: по умолчанию выключен (404). METRICS_ALLOWED_IPS —
+# адреса через запятую, которым он доступен; пусто — любым.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+METRICS_ALLOWED_IPS = [
+    address.strip()
+    for address in os.getenv('METRICS_ALLOWED_IPS', '').split(',')
+    if address.strip()
+]
+
+# Кеш «токен -> пользователь»: размер LRU в процессе и время жизни
+# записи, в секундах. Версии токенов хранятся в CACHES: с общим кешем
+# (Redis, Memcached) выход или смена пароля сразу действуют во всех
+# воркерах. С AUTH_TOKEN_CACHE_SHARED в общем кеше хранятся и записи.
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 10000))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', 60))
+AUTH_TOKEN_CACHE_SHARED = os.getenv(
+    'AUTH_TOKEN_CACHE_SHARED', 'False'
+) == 'True'
+
+# Асинхронные представления для чтения рецептов, ингредиентов, коротких
+# ссылок и health; имеет смысл под ASGI (GUNICORN_PROFILE=uvicorn).
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
+
+# Время жизни индекса ингредиентов для автодополнения, в секундах
+INGREDIENT_INDEX_TTL = int(os.getenv('INGREDIENT_INDEX_TTL', 300))
+
 ALLOWED_IMAGE_TYPES = ['jpeg', 'jpg', 'png', 'gif']
+
+# Уменьшенные копии изображений: название -> максимальная сторона, px.
+# Строятся в фоне очередью IMAGE_TASK_QUEUE на IMAGE_WORKERS потоках.
+IMAGE_VARIANTS = {
+    'thumbnail': 320,
+    'medium': 960,
+}
+IMAGE_TASK_QUEUE = os.getenv(
+    'IMAGE_TASK_QUEUE', 'recipes.images.ThreadPoolQueue'
+)
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+
+# Имена аватаров по хешу содержимого: адрес файла не меняется,
+# пока не изменится картинка, и его можно кешировать навсегда.
+AVATAR_CONTENT_HASH_NAMES = os.getenv(
+    'AVATAR_CONTENT_HASH_NAMES', 'False'
+) == 'True'
 MAX_IMAGE_SIZE = 2 * 1024 * 1024
 
 # Internationalizations
@@ -0,0 +1,43 @@
+"""
+Настройки gunicorn из переменных окружения.
+
+GUNICORN_PROFILE выбирает воркеры:
+- sync — процесс обслуживает один запрос за раз (по умолчанию);
+- gthread — процесс с GUNICORN_THREADS потоками;
+- uvicorn — асинхронные воркеры uvicorn с ASGI-приложением.
+"""
+import multiprocessing
+import os
+
+PROFILES = {
+    'sync': ('sync', 'foodgram.wsgi:application'),
+    'gthread': ('gthread', 'foodgram.wsgi:application'),
+    'uvicorn': ('uvicorn_worker.UvicornWorker', 'foodgram.asgi:application'),
+}
+
+profile = os.getenv('GUNICORN_PROFILE', 'sync')
+if profile not in PROFILES:
+    raise RuntimeError(
+        f'Неизвестный GUNICORN_PROFILE: {profile}; '
+        f'доступны {", ".join(PROFILES)}'
+    )
+worker_class, wsgi_app = PROFILES[profile]
+
+if profile == 'uvicorn':
+    # Под ASGI постоянные соединения Django не переиспользуются между
+    # запросами: вместо них нужен пул (DB_POOL).
+    os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv(
+    'GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1
+))
+threads = int(os.getenv(
+    'GUNICORN_THREADS', 4 if profile == 'gthread' else 1
+))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 2))
+# Перезапуск воркера после стольких запросов; 0 — без перезапуска.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
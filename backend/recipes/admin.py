@@ -43,10 +43,16 @@ class RecipeAdmin(admin.ModelAdmin):
     list_filter = ('author', CookingTimeFilter)
     inlines = [RecipeIngredientInline]
     readonly_fields = ('show_favorites_count', 'show_image')
+    list_select_related = ('author',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(
+            'recipe_ingredients__ingredient'
+        )
 
     @admin.display(description='В избранном')
     def show_favorites_count(self, recipe):
-        return recipe.favorited_by.count()
+        return recipe.favorites_count
 
     @admin.display(description='Ингредиенты')
     def show_ingredients(self, recipe):
@@ -93,4 +99,4 @@ class IngredientAdmin(admin.ModelAdmin):
 
     @admin.display(description='Рецептов')
     def recipes_count(self, ingredient):
-        return ingredient.ingredient_recipes.count()
+        return ingredient.recipes_count
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from recipes import signals  # noqa: F401
+        from recipes.metrics import install_query_recorder
+
+        connection_created.connect(install_query_recorder)
@@ -0,0 +1,140 @@
+from collections import defaultdict
+from heapq import merge
+from itertools import groupby
+from operator import itemgetter
+
+from django.db.models import BigIntegerField, Case, F, Sum, Value, When
+from django.db.models.functions import Greatest
+
+from recipes.models import RecipeIngredient, ShoppingCart, ShoppingListItem
+
+BATCH_SIZE = 2000
+
+
+def recipe_amounts(recipe_ids, sign=1):
+    """Сумма каждого ингредиента по рецептам, умноженная на sign."""
+    deltas = defaultdict(int)
+    for ingredient_id, amount in RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('ingredient_id', 'amount'):
+        deltas[ingredient_id] += sign * amount
+    return deltas
+
+
+def shift_totals(user_ids, deltas):
+    """
+    Прибавляет к спискам покупок пользователей `user_ids` изменения
+    {ingredient_id: delta}: недостающие строки создаются, суммы
+    сдвигаются одним UPDATE, обнулившиеся строки удаляются.
+    """
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not user_ids or not deltas:
+        return
+    added = [pk for pk, delta in deltas.items() if delta > 0]
+    if added:
+        ShoppingListItem.objects.bulk_create(
+            (
+                ShoppingListItem(user_id=user_id, ingredient_id=pk)
+                for user_id in user_ids for pk in added
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True
+        )
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=deltas
+    )
+    items.update(total_amount=Greatest(
+        F('total_amount') + Case(
+            *(When(ingredient_id=pk, then=Value(delta))
+              for pk, delta in deltas.items()),
+            default=Value(0),
+            output_field=BigIntegerField()
+        ),
+        Value(0)
+    ))
+    items.filter(total_amount=0).delete()
+
+
+def shift_cart(user_id, recipe_ids, sign):
+    """Рецепты добавлены в корзину (sign=1) или удалены из неё (-1)."""
+    if recipe_ids:
+        shift_totals([user_id], recipe_amounts(recipe_ids, sign))
+
+
+def shift_recipe(recipe_id, deltas):
+    """Ингредиенты рецепта изменились: правим списки всех его покупателей."""
+    if not deltas:
+        return
+    user_ids = list(ShoppingCart.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('user_id', flat=True))
+    shift_totals(user_ids, deltas)
+
+
+def expected_totals(user_ids=None):
+    """Эталонные суммы, посчитанные заново по корзинам."""
+    # Одно условие на корзину: второй filter() по связи «многие»
+    # добавил бы ещё один JOIN и размножил суммы.
+    if user_ids is None:
+        lookup = {'recipe__in_shopping_cart__isnull': False}
+    else:
+        lookup = {'recipe__in_shopping_cart__user__in': user_ids}
+    return RecipeIngredient.objects.filter(**lookup).values_list(
+        'recipe__in_shopping_cart__user', 'ingredient_id'
+    ).annotate(total=Sum('amount')).order_by(
+        'recipe__in_shopping_cart__user', 'ingredient_id'
+    )
+
+
+def stored_totals(user_ids=None):
+    queryset = ShoppingListItem.objects.all()
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+    return queryset.values_list(
+        'user_id', 'ingredient_id', 'total_amount'
+    ).order_by('user_id', 'ingredient_id')
+
+
+def rebuild(user_ids=None):
+    """Пересобирает списки покупок с нуля, возвращает число строк."""
+    # counters сам импортирует этот модуль.
+    from recipes.counters import delete_rows
+
+    items = ShoppingListItem.objects.all()
+    if user_ids is not None:
+        items = items.filter(user_id__in=user_ids)
+    delete_rows(items)
+    created = ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=pk, total_amount=total
+            )
+            for user_id, pk, total in expected_totals(user_ids).iterator(
+                chunk_size=BATCH_SIZE
+            )
+        ),
+        batch_size=BATCH_SIZE
+    )
+    return len(created)
+
+
+def find_mismatches(user_ids=None):
+    """
+    Сравнивает сохранённые суммы с эталоном слиянием двух
+    отсортированных потоков, не загружая их в память целиком.
+    Отдаёт кортежи (user_id, ingredient_id, ожидалось, сохранено).
+    """
+    expected = (
+        ((user_id, pk), 0, total) for user_id, pk, total in
+        expected_totals(user_ids).iterator(chunk_size=BATCH_SIZE)
+    )
+    stored = (
+        ((user_id, pk), 1, total) for user_id, pk, total in
+        stored_totals(user_ids).iterator(chunk_size=BATCH_SIZE)
+    )
+    for key, rows in groupby(merge(expected, stored), key=itemgetter(0)):
+        totals = [0, 0]
+        for _, source, total in rows:
+            totals[source] = total
+        if totals[0] != totals[1]:
+            yield (*key, *totals)
@@ -0,0 +1,133 @@
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, router
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from recipes.cart_totals import shift_cart
+from recipes.models import (
+    Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart,
+    Subscription
+)
+from users.models import User
+
+
+def shift_counter(queryset, field, delta):
+    """
+    Атомарно сдвигает счётчик `field` на `delta` у всех строк queryset
+    одним UPDATE, не опускаясь ниже нуля.
+    """
+    if delta:
+        queryset.update(**{field: Greatest(F(field) + delta, Value(0))})
+
+
+def insert_rows(objs, returning):
+    """
+    Вставляет объекты одним INSERT ... ON CONFLICT DO NOTHING без
+    сигналов и возвращает значения поля `returning` только действительно
+    вставленных строк: строки, которые уже были или успели появиться
+    в параллельной транзакции, в результат не попадают.
+    """
+    objs = list(objs)
+    if not objs:
+        return []
+    opts = objs[0]._meta
+    connection = connections[router.db_for_write(opts.model)]
+    quote = connection.ops.quote_name
+    fields = [
+        field for field in opts.concrete_fields
+        if field is not opts.auto_field
+    ]
+    row = f'({", ".join(["%s"] * len(fields))})'
+    sql = (
+        f'INSERT INTO {quote(opts.db_table)} '
+        f'({", ".join(quote(field.column) for field in fields)}) '
+        f'VALUES {", ".join([row] * len(objs))} '
+        f'ON CONFLICT DO NOTHING '
+        f'RETURNING {quote(opts.get_field(returning).column)}'
+    )
+    params = [
+        field.get_db_prep_save(field.pre_save(obj, True), connection)
+        for obj in objs for field in fields
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [value for value, in cursor.fetchall()]
+
+
+def delete_rows(queryset, returning=None):
+    """
+    Удаляет строки queryset одним DELETE без выборки объектов и сигналов.
+    С `returning` возвращает значения этого поля действительно удалённых
+    строк (DELETE ... RETURNING): строки, удалённые параллельной
+    транзакцией, в результат не попадают; без него — число строк.
+    Каскады и счётчики остаются на вызывающем коде.
+    """
+    opts = queryset.model._meta
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    try:
+        subquery, params = queryset.order_by().values('pk').query.get_compiler(
+            queryset.db
+        ).as_sql()
+    except EmptyResultSet:
+        return [] if returning else 0
+    sql = (
+        f'DELETE FROM {quote(opts.db_table)} '
+        f'WHERE {quote(opts.pk.column)} IN ({subquery})'
+    )
+    if returning:
+        sql += f' RETURNING {quote(opts.get_field(returning).column)}'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        if not returning:
+            return cursor.rowcount
+        return [value for value, in cursor.fetchall()]
+
+
+def shift_relation_counters(model, user, recipe_ids, delta):
+    """
+    Обновляет счётчики и список покупок после изменений избранного
+    или корзины, выполненных в обход сигналов (insert_rows, delete_rows).
+    """
+    if model is Favorite and recipe_ids:
+        shift_counter(
+            Recipe.objects.filter(pk__in=recipe_ids),
+            'favorites_count', delta
+        )
+    if model is ShoppingCart:
+        shift_cart(user.pk, recipe_ids, delta)
+
+
+def _count_subquery(model, fk_name):
+    """Подзапрос с количеством строк `model`, ссылающихся на объект."""
+    return Coalesce(Subquery(
+        model.objects.filter(
+            **{fk_name: OuterRef('pk')}
+        ).order_by().values(fk_name).annotate(
+            total=Count('pk')
+        ).values('total')
+    ), 0)
+
+
+# Счётчик -> модель, которую он считает, и её внешний ключ.
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'subscribers_count', Subscription, 'author'),
+    (Ingredient, 'recipes_count', RecipeIngredient, 'ingredient'),
+)
+
+
+def recount():
+    """
+    Пересчитывает все денормализованные счётчики.
+    Обновляются только разошедшиеся строки, возвращает их количество
+    по каждому счётчику.
+    """
+    fixed = {}
+    for model, field, counted_model, fk_name in COUNTERS:
+        actual = _count_subquery(counted_model, fk_name)
+        fixed[f'{model.__name__}.{field}'] = model.objects.annotate(
+            actual=actual
+        ).exclude(**{field: F('actual')}).update(**{field: actual})
+    return fixed
@@ -1,4 +1,6 @@
+import hashlib
 import os
+import uuid
 
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as fmt
@@ -18,3 +20,23 @@ def validate_image(image):
 
     if image.size > MAX_IMAGE_SIZE:
         raise ValidationError(fmt(UNSUPPORTED_IMAGE_SIZE))
+
+
+def content_hashed_name(file):
+    """
+    Имя файла по SHA-256 содержимого: одинаковые файлы получают
+    одинаковый адрес, новое содержимое — новый.
+    Файл читается по частям, без загрузки целиком в память.
+    """
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    ext = os.path.splitext(file.name)[1].lower()
+    return f'{digest.hexdigest()[:32]}{ext}'
+
+
+def random_name(file):
+    """Случайное имя с расширением файла: имя от клиента не сохраняется."""
+    ext = os.path.splitext(file.name)[1].lower()
+    return f'{uuid.uuid4()}{ext}'
@@ -0,0 +1,158 @@
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = 'variants'
+SOURCE_KEY = 'source'
+WEBP = 'WEBP'
+
+
+class ThreadPoolQueue:
+    """Очередь задач на пуле потоков текущего процесса."""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS,
+            thread_name_prefix='image-variants'
+        )
+
+    def submit(self, func, *args):
+        self.executor.submit(run_task, func, *args)
+
+
+class InlineQueue:
+    """Выполняет задачи сразу в вызывающем потоке."""
+
+    def submit(self, func, *args):
+        func(*args)
+
+
+def run_task(func, *args):
+    """Выполняет задачу в потоке пула, возвращает признак успеха."""
+    try:
+        func(*args)
+        return True
+    except Exception:
+        logger.exception('Не удалось построить варианты изображения')
+        return False
+    finally:
+        # У потока пула собственные соединения с БД.
+        connections.close_all()
+
+
+@lru_cache(maxsize=None)
+def get_queue():
+    return import_string(settings.IMAGE_TASK_QUEUE)()
+
+
+def _variant_name(source, variant, extension):
+    directory, filename = posixpath.split(source)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(
+        VARIANTS_DIR, directory, f'{stem}_{variant}.{extension}'
+    )
+
+
+def _encode(image, image_format):
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, quality=85)
+    return buffer.getvalue()
+
+
+def _store(name, content):
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    return default_storage.save(name, ContentFile(content))
+
+
+def delete_variants(variants):
+    for variant, name in variants.items():
+        if variant != SOURCE_KEY and default_storage.exists(name):
+            default_storage.delete(name)
+
+
+def build_variants(source):
+    """
+    Строит уменьшенные копии изображения `source` в исходном формате
+    и в WebP для каждого размера из IMAGE_VARIANTS, а также полноразмерную
+    WebP-копию. Возвращает словарь вариант -> путь в хранилище.
+    """
+    with default_storage.open(source, 'rb') as file:
+        original = Image.open(file)
+        source_format = original.format
+        image = ImageOps.exif_transpose(original)
+    extension = posixpath.splitext(source)[1][1:].lower() or 'png'
+
+    variants = {SOURCE_KEY: source}
+    variants['webp'] = _store(
+        _variant_name(source, 'full', 'webp'), _encode(image, WEBP)
+    )
+    for variant, max_side in settings.IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((max_side, max_side))
+        variants[variant] = _store(
+            _variant_name(source, variant, extension),
+            _encode(resized, source_format)
+        )
+        variants[f'{variant}_webp'] = _store(
+            _variant_name(source, variant, 'webp'), _encode(resized, WEBP)
+        )
+    return variants
+
+
+def refresh_variants(model, pk, image_field, variants_field):
+    """
+    Приводит варианты изображения объекта к его текущему изображению.
+    Устаревшие файлы вариантов удаляются.
+    """
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not needs_refresh(
+        instance, image_field, variants_field
+    ):
+        return
+    source = getattr(instance, image_field).name
+    old_variants = getattr(instance, variants_field)
+
+    new_variants = build_variants(source) if source else {}
+    # Изображение могло смениться, пока строились варианты.
+    still_current = model.objects.filter(
+        pk=pk, **{image_field: source}
+    ).exists()
+    if not still_current:
+        delete_variants(new_variants)
+        return
+    setattr(instance, variants_field, new_variants)
+    instance.save(update_fields=[variants_field])
+    delete_variants({
+        variant: name for variant, name in old_variants.items()
+        if name not in new_variants.values()
+    })
+
+
+def needs_refresh(instance, image_field, variants_field):
+    source = getattr(instance, image_field).name or ''
+    variants = getattr(instance, variants_field)
+    if not source:
+        return bool(variants)
+    return variants.get(SOURCE_KEY) != source
+
+
+def schedule_variants(instance, image_field, variants_field):
+    """Ставит построение вариантов в очередь после коммита транзакции."""
+    if not needs_refresh(instance, image_field, variants_field):
+        return
+    args = (type(instance), instance.pk, image_field, variants_field)
+    transaction.on_commit(lambda: get_queue().submit(refresh_variants, *args))
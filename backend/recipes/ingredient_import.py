@@ -0,0 +1,216 @@
+import csv
+import io
+import json
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from recipes.models import Ingredient
+
+CHUNK_SIZE = 10000
+READ_SIZE = 64 * 1024
+HEADER = ('name', 'measurement_unit')
+FORMATS = ('csv', 'json', 'jsonl')
+SEPARATORS = ' \t\r\n,'
+
+
+def default_path():
+    """Справочник из репозитория: data/ рядом с backend или внутри него."""
+    for base in (settings.BASE_DIR, settings.BASE_DIR.parent):
+        path = Path(base) / 'data' / 'ingredients.csv'
+        if path.exists():
+            return path
+    return None
+
+
+def detect_format(path):
+    suffix = Path(path).suffix.lstrip('.').lower()
+    if suffix == 'ndjson':
+        return 'jsonl'
+    if suffix not in FORMATS:
+        raise ValueError(f'Неизвестный формат файла: {path}')
+    return suffix
+
+
+def _iter_csv(file):
+    reader = csv.reader(file)
+    for row in reader:
+        if reader.line_num == 1 and tuple(row) == HEADER:
+            continue
+        if row:
+            yield row
+
+
+def _iter_json_array(file):
+    """Разбирает JSON-массив объектов по частям, не читая файл целиком."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    while True:
+        chunk = file.read(READ_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in SEPARATORS:
+                position += 1
+            if not started and position < len(buffer):
+                if buffer[position] != '[':
+                    raise ValueError('Ожидался JSON-массив ингредиентов.')
+                started = True
+                position += 1
+                continue
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise
+                break
+            yield item
+
+
+def _iter_json_lines(file):
+    for number, line in enumerate(file, 1):
+        if line.strip():
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError as error:
+                raise ValueError(f'Строка {number}: {error}.')
+
+
+def _json_rows(items, label):
+    """Пары (название, единица) из пар (номер, объект JSON)."""
+    for number, item in items:
+        if not isinstance(item, dict):
+            raise ValueError(f'{label} {number}: ожидался объект.')
+        missing = [field for field in HEADER if field not in item]
+        if missing:
+            raise ValueError(
+                f'{label} {number}: нет поля {", ".join(missing)}.'
+            )
+        yield item['name'], item['measurement_unit']
+
+
+def read_ingredients(file, file_format):
+    """Построчно отдаёт пары (название, единица измерения) из файла."""
+    if file_format == 'csv':
+        rows = _iter_csv(file)
+    elif file_format == 'json':
+        rows = _json_rows(enumerate(_iter_json_array(file), 1), 'Элемент')
+    else:
+        rows = _json_rows(_iter_json_lines(file), 'Строка')
+    name_length = Ingredient._meta.get_field('name').max_length
+    unit_length = Ingredient._meta.get_field('measurement_unit').max_length
+    for number, row in enumerate(rows, 1):
+        try:
+            name, unit = (value.strip() for value in row)
+        except (TypeError, ValueError, AttributeError):
+            raise ValueError(f'Строка {number}: ожидалось два поля.')
+        if not name or not unit:
+            raise ValueError(f'Строка {number}: пустое значение.')
+        if len(name) > name_length or len(unit) > unit_length:
+            raise ValueError(f'Строка {number}: слишком длинное значение.')
+        yield name, unit
+
+
+class _CSVStream(io.TextIOBase):
+    """Файлоподобный источник для COPY: собирает CSV по мере чтения."""
+
+    def __init__(self, rows, on_chunk=None, chunk_size=CHUNK_SIZE):
+        self.rows = rows
+        self.on_chunk = on_chunk
+        self.chunk_size = chunk_size
+        self.count = 0
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or self.buffer.tell() < size:
+            chunk = list(islice(self.rows, self.chunk_size))
+            if not chunk:
+                break
+            self.writer.writerows(chunk)
+            self.count += len(chunk)
+            if self.on_chunk:
+                self.on_chunk(self.count)
+        data = self.buffer.getvalue()
+        if 0 <= size < len(data):
+            data, rest = data[:size], data[size:]
+        else:
+            rest = ''
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.buffer.write(rest)
+        return data
+
+
+def _copy(cursor, sql, stream):
+    if hasattr(cursor, 'copy_expert'):
+        # psycopg2
+        cursor.copy_expert(sql, stream, size=READ_SIZE)
+        return
+    # psycopg 3
+    with cursor.copy(sql) as copy:
+        while data := stream.read(READ_SIZE):
+            copy.write(data)
+
+
+def _import_postgresql(rows, on_chunk, chunk_size):
+    """COPY во временную таблицу и одна вставка с ON CONFLICT DO NOTHING."""
+    table = Ingredient._meta.db_table
+    name_length = Ingredient._meta.get_field('name').max_length
+    unit_length = Ingredient._meta.get_field('measurement_unit').max_length
+    stream = _CSVStream(rows, on_chunk, chunk_size)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TEMPORARY TABLE ingredient_staging ('
+            f'name varchar({name_length}) NOT NULL, '
+            f'measurement_unit varchar({unit_length}) NOT NULL'
+            ') ON COMMIT DROP'
+        )
+        _copy(
+            cursor,
+            'COPY ingredient_staging (name, measurement_unit) '
+            'FROM STDIN WITH (FORMAT csv)',
+            stream
+        )
+        cursor.execute(
+            f'INSERT INTO {table} (name, measurement_unit, recipes_count) '
+            'SELECT name, measurement_unit, 0 FROM ingredient_staging '
+            'ON CONFLICT ON CONSTRAINT unique_ingredient_unit DO NOTHING'
+        )
+        return stream.count, cursor.rowcount
+
+
+def _import_bulk_create(rows, on_chunk, chunk_size):
+    before = Ingredient.objects.count()
+    total = 0
+    while chunk := list(islice(rows, chunk_size)):
+        Ingredient.objects.bulk_create(
+            (Ingredient(name=name, measurement_unit=unit)
+             for name, unit in chunk),
+            ignore_conflicts=True
+        )
+        total += len(chunk)
+        if on_chunk:
+            on_chunk(total)
+    return total, Ingredient.objects.count() - before
+
+
+def import_ingredients(rows, on_chunk=None, chunk_size=CHUNK_SIZE):
+    """
+    Загружает пары (название, единица) порциями по chunk_size,
+    пропуская уже существующие. Возвращает (прочитано, добавлено).
+    """
+    rows = iter(rows)
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            return _import_postgresql(rows, on_chunk, chunk_size)
+        return _import_bulk_create(rows, on_chunk, chunk_size)
@@ -0,0 +1,111 @@
+import threading
+import time
+from bisect import bisect_left
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.models import Ingredient
+
+VERSION_CACHE_KEY = 'ingredient_index_version'
+
+
+class IngredientPrefixIndex:
+    """
+    Индекс ингредиентов в памяти процесса для автодополнения.
+
+    Ингредиенты хранятся отсортированными по названию в нижнем
+    регистре, поиск по префиксу — двоичный поиск без обращения к БД,
+    ранжированный поиск добавляет к нему вхождения подстроки.
+    Индекс перестраивается при смене версии в кеше (её меняет
+    `invalidate`) или по истечении INGREDIENT_INDEX_TTL секунд.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def _is_fresh(self, snapshot, version):
+        if snapshot is None:
+            return False
+        keys, items, built_at, built_version = snapshot
+        age = time.monotonic() - built_at
+        return built_version == version and age < settings.INGREDIENT_INDEX_TTL
+
+    def _build(self, version):
+        items = sorted(
+            Ingredient.objects.all(),
+            key=lambda item: (item.name.lower(), item.measurement_unit)
+        )
+        keys = [item.name.lower() for item in items]
+        return keys, items, time.monotonic(), version
+
+    def _rebuild(self, version):
+        with self._lock:
+            if not self._is_fresh(self._snapshot, version):
+                self._snapshot = self._build(version)
+            return self._snapshot
+
+    def _get_snapshot(self):
+        version = cache.get(VERSION_CACHE_KEY)
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot, version):
+            return snapshot
+        return self._rebuild(version)
+
+    def search(self, prefix):
+        """Ингредиенты, название которых начинается с `prefix`."""
+        return self._search(self._get_snapshot(), prefix)
+
+    async def asearch(self, prefix):
+        """Асинхронный `search`: индекс перестраивается в потоке."""
+        version = await cache.aget(VERSION_CACHE_KEY)
+        snapshot = self._snapshot
+        if not self._is_fresh(snapshot, version):
+            snapshot = await sync_to_async(self._rebuild)(version)
+        return self._search(snapshot, prefix)
+
+    def rank(self, term, limit):
+        """
+        Ранжированный поиск: сначала названия, начинающиеся с `term`,
+        затем содержащие его, не больше `limit`.
+        """
+        return self._rank(self._get_snapshot(), term, limit)
+
+    async def arank(self, term, limit):
+        """Асинхронный `rank`."""
+        version = await cache.aget(VERSION_CACHE_KEY)
+        snapshot = self._snapshot
+        if not self._is_fresh(snapshot, version):
+            snapshot = await sync_to_async(self._rebuild)(version)
+        return self._rank(snapshot, term, limit)
+
+    def _rank(self, snapshot, term, limit):
+        found = self._search(snapshot, term)[:limit]
+        if len(found) < limit:
+            keys, items, *_ = snapshot
+            term = term.lower()
+            found.extend(islice((
+                item for key, item in zip(keys, items)
+                if term in key and not key.startswith(term)
+            ), limit - len(found)))
+        return found
+
+    def _search(self, snapshot, prefix):
+        keys, items, *_ = snapshot
+        prefix = prefix.lower()
+        start = bisect_left(keys, prefix)
+        end = start
+        while end < len(keys) and keys[end].startswith(prefix):
+            end += 1
+        return items[start:end]
+
+    def invalidate(self):
+        """Сбрасывает индекс во всех процессах, разделяющих кеш."""
+        self._snapshot = None
+        cache.set(VERSION_CACHE_KEY, time.time_ns(), timeout=None)
+
+
+ingredient_index = IngredientPrefixIndex()
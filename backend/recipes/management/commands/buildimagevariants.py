@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.images import needs_refresh, refresh_variants, run_task
+from recipes.models import Recipe
+from users.models import User
+
+TARGETS = (
+    (Recipe, 'image', 'image_variants'),
+    (User, 'avatar', 'avatar_variants'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Строит недостающие варианты изображений рецептов и аватаров'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.IMAGE_WORKERS,
+            help='Количество потоков обработки'
+        )
+
+    def handle(self, *args, **options):
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for model, image_field, variants_field in TARGETS:
+                objects = model.objects.only(
+                    'pk', image_field, variants_field
+                ).iterator()
+                results = list(pool.map(
+                    lambda pk: run_task(
+                        refresh_variants, model, pk,
+                        image_field, variants_field
+                    ),
+                    [
+                        obj.pk for obj in objects
+                        if needs_refresh(obj, image_field, variants_field)
+                    ]
+                ))
+                failed = results.count(False)
+                self.stdout.write(
+                    f'{model._meta.verbose_name_plural}: '
+                    f'обработано {len(results) - failed}, ошибок {failed}'
+                )
+        self.stdout.write(self.style.SUCCESS('Варианты изображений готовы.'))
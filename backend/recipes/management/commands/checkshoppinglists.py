@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.cart_totals import find_mismatches
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет сохранённые списки покупок с суммами по корзинам. '
+        'Расхождения исправляет rebuildshoppinglists'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='users',
+            help='id пользователя; по умолчанию все'
+        )
+
+    def handle(self, *args, **options):
+        users = set()
+        for user_id, ingredient_id, expected, stored in find_mismatches(
+            options['users']
+        ):
+            users.add(user_id)
+            self.stdout.write(
+                f'Пользователь {user_id}, ингредиент {ingredient_id}: '
+                f'ожидалось {expected}, сохранено {stored}'
+            )
+        if users:
+            raise CommandError(
+                f'Расхождения у пользователей: {len(users)}.'
+            )
+        self.stdout.write(self.style.SUCCESS('Списки покупок согласованы.'))
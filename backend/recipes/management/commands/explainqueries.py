@@ -0,0 +1,146 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from users.models import User
+
+# Название -> адрес; {recipe} и {author} берутся из данных.
+HOT_QUERIES = (
+    ('RecipeViewSet.list', '/api/recipes/'),
+    ('RecipeViewSet.list (cursor)', '/api/recipes/?pagination=cursor'),
+    ('RecipeViewSet.retrieve', '/api/recipes/{recipe}/'),
+    ('RecipeViewSet.shopping_list', '/api/recipes/shopping_list/'),
+    ('RecipeFilter.author', '/api/recipes/?author={author}'),
+    ('RecipeFilter.is_favorited', '/api/recipes/?is_favorited=1'),
+    ('RecipeFilter.is_in_shopping_cart',
+     '/api/recipes/?is_in_shopping_cart=1'),
+    ('UserViewSet.list', '/api/users/'),
+    ('UserViewSet.retrieve', '/api/users/{author}/'),
+    ('UserViewSet.me', '/api/users/me/'),
+    ('UserViewSet.subscriptions',
+     '/api/users/subscriptions/?recipes_limit=3'),
+)
+# Строки плана с полным просмотром таблицы.
+SEQUENTIAL_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)$'),
+}
+SQL_PREVIEW = 100
+
+
+def explain(sql):
+    """План запроса; на PostgreSQL — EXPLAIN ANALYZE с откатом."""
+    options = {'analyze': True} if connection.vendor == 'postgresql' else {}
+    prefix = connection.ops.explain_query_prefix(**options)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}')
+            rows = cursor.fetchall()
+        transaction.set_rollback(True)
+    return [str(row[-1]) for row in rows]
+
+
+def sequential_scans(plan, tables):
+    """Таблицы из `tables`, которые план просматривает целиком."""
+    pattern = SEQUENTIAL_SCAN.get(connection.vendor)
+    if pattern is None:
+        return []
+    return [
+        match.group(1) for line in plan
+        if (match := pattern.search(line.strip()))
+        and match.group(1) in tables
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN ANALYZE для SQL-запросов основных '
+        'представлений API и отмечает полные просмотры таблиц'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int,
+            help='id пользователя запросов; по умолчанию — с самым '
+                 'большим избранным'
+        )
+        parser.add_argument(
+            '--host', default='localhost',
+            help='Хост запросов из ALLOWED_HOSTS'
+        )
+        parser.add_argument(
+            '--fail-on-seq-scan', action='store_true',
+            help='Завершиться ошибкой, если найдены полные просмотры'
+        )
+
+    def get_user(self, user_id):
+        if user_id is not None:
+            user = User.objects.filter(pk=user_id).first()
+        else:
+            user = User.objects.annotate(
+                favorites=Count('favorite')
+            ).order_by('-favorites', 'id').first()
+        if user is None:
+            raise CommandError('Пользователь не найден.')
+        return user
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        recipe = Recipe.objects.order_by('-pub_date', '-id').first()
+        if recipe is None:
+            raise CommandError('В базе нет рецептов.')
+        client = APIClient(HTTP_HOST=options['host'])
+        client.force_authenticate(user)
+
+        # Подзапросы в плане SQLite тоже выглядят как SCAN.
+        tables = set(connection.introspection.table_names())
+        flagged = []
+        for name, url in HOT_QUERIES:
+            url = url.format(recipe=recipe.pk, author=recipe.author_id)
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{name}: GET {url} -> {response.status_code}'
+            ))
+            seen = set()
+            for query in queries.captured_queries:
+                sql = query['sql']
+                if sql in seen or not sql.lstrip().upper().startswith(
+                    ('SELECT', 'WITH')
+                ):
+                    continue
+                seen.add(sql)
+                plan = explain(sql)
+                scanned = sequential_scans(plan, tables)
+                line = f'  {query["time"]} с: {sql[:SQL_PREVIEW]}'
+                if scanned:
+                    flagged.append((name, scanned))
+                    self.stdout.write(self.style.WARNING(
+                        f'{line}\n    полный просмотр: {", ".join(scanned)}'
+                    ))
+                else:
+                    self.stdout.write(line)
+                if options['verbosity'] > 1:
+                    self.stdout.write('\n'.join(
+                        f'    | {row}' for row in plan
+                    ))
+
+        if not flagged:
+            self.stdout.write(self.style.SUCCESS(
+                'Полных просмотров таблиц нет.'
+            ))
+            return
+        summary = '\n'.join(
+            f'  {name}: {", ".join(scanned)}' for name, scanned in flagged
+        )
+        message = f'Полные просмотры таблиц:\n{summary}'
+        if options['fail_on_seq_scan']:
+            raise CommandError(message)
+        self.stdout.write(self.style.WARNING(message))
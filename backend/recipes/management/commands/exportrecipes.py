@@ -0,0 +1,35 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.transfer import CHUNK_SIZE, export_recipes
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает рецепты с авторами, ингредиентами и путями к картинкам '
+        'в формате JSON Lines'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для выгрузки; по умолчанию стандартный вывод'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Рецептов, читаемых из базы за раз'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['path'] == '-':
+            count = export_recipes(sys.stdout, options['chunk_size'])
+        else:
+            with open(options['path'], 'w', encoding='utf-8') as file:
+                count = export_recipes(file, options['chunk_size'])
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено {count} рецептов за '
+            f'{time.monotonic() - started:.2f} с.'
+        ))
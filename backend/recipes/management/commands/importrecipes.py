@@ -0,0 +1,63 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.cache import (
+    INGREDIENTS_CACHE, RECIPES_CACHE, invalidate_cached_responses
+)
+from recipes.counters import recount
+from recipes.ingredient_index import ingredient_index
+from recipes.transfer import BATCH_SIZE, RecipeImporter
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает рецепты из JSON Lines, созданного exportrecipes. '
+        'Медиафайлы переносятся отдельно'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для загрузки; по умолчанию стандартный ввод'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Рецептов в одной пачке вставки'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def progress(created, skipped):
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'Создано {created}, пропущено {skipped}, '
+                f'{created / elapsed if elapsed else 0:.0f} рецептов/с'
+            )
+
+        importer = RecipeImporter(options['batch_size'])
+        try:
+            if options['path'] == '-':
+                created, skipped = importer.run(sys.stdin, progress)
+            else:
+                with open(options['path'], encoding='utf-8') as file:
+                    created, skipped = importer.run(file, progress)
+        except FileNotFoundError:
+            raise CommandError(f'Файл не найден: {options["path"]}')
+        except ValueError as error:
+            raise CommandError(f'Ошибка импорта: {error}')
+        finally:
+            if importer.created:
+                # bulk_create не вызывает сигналы: пересчитываем счётчики.
+                with transaction.atomic():
+                    recount()
+                ingredient_index.invalidate()
+                invalidate_cached_responses(INGREDIENTS_CACHE, RECIPES_CACHE)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {created} рецептов, пропущено существующих '
+            f'{skipped} за {time.monotonic() - started:.2f} с.'
+        ))
@@ -1,53 +1,69 @@
 import json
-from pathlib import Path
+import time
 
-from django.conf import settings
-from django.core.management.base import BaseCommand
-from django.db import transaction
-from recipes.models import Ingredient
+from django.core.management.base import BaseCommand, CommandError
+
+from api.cache import (
+    INGREDIENTS_CACHE, RECIPES_CACHE, invalidate_cached_responses
+)
+from recipes.ingredient_import import (
+    CHUNK_SIZE, FORMATS, default_path, detect_format, import_ingredients,
+    read_ingredients
+)
+from recipes.ingredient_index import ingredient_index
 
 
 class Command(BaseCommand):
-    help = 'Импортирует ингредиенты из JSON-файла'
+    help = 'Импортирует ингредиенты из CSV, JSON или JSON Lines'
 
-    def handle(self, *args, **kwargs):
-        file_path = Path(settings.BASE_DIR) / 'data' / 'ingredients.json'
-        try:
-            with open(file_path, encoding='utf-8') as f:
-                ingredients_data = json.load(f)
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?',
+            help='Путь к файлу; по умолчанию data/ingredients.csv'
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла; по умолчанию по расширению'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Строк в одной порции'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path'] or default_path()
+        if path is None:
+            raise CommandError('Не найден файл data/ingredients.csv.')
+        started = time.monotonic()
 
-            existing = set(
-                Ingredient.objects.values_list('name', 'measurement_unit')
+        def progress(count):
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'Прочитано {count} строк, '
+                f'{count / elapsed if elapsed else 0:.0f} строк/с'
             )
-            new_ingredients = [
-                Ingredient(**elem)
-                for elem in ingredients_data
-                if (elem['name'], elem['measurement_unit']) not in existing
-            ]
-
-            if not new_ingredients:
-                self.stdout.write(self.style.SUCCESS(
-                    'Нет новых ингредиентов для добавления.'
-                ))
-                return
-
-            with transaction.atomic():
-                created = Ingredient.objects.bulk_create(
-                    new_ingredients,
-                    ignore_conflicts=True
+
+        try:
+            file_format = options['format'] or detect_format(path)
+            with open(path, encoding='utf-8', newline='') as file:
+                read, created = import_ingredients(
+                    read_ingredients(file, file_format),
+                    on_chunk=progress,
+                    chunk_size=options['chunk_size']
                 )
-                self.stdout.write(self.style.SUCCESS(
-                    f'Добавлено {len(created)} новых ингредиентов.'
-                ))
         except FileNotFoundError:
-            self.stdout.write(self.style.ERROR(
-                f'Файл не найден: {file_path}'
-            ))
-        except json.JSONDecodeError as e:
-            self.stdout.write(self.style.ERROR(
-                f'Ошибка распаковки JSON: {e}'
-            ))
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(
-                f'Ошибка импорта: {e}'
-            ))
+            raise CommandError(f'Файл не найден: {path}')
+        except json.JSONDecodeError as error:
+            raise CommandError(f'Ошибка распаковки JSON: {error}')
+        except ValueError as error:
+            raise CommandError(f'Ошибка импорта: {error}')
+
+        if created:
+            # Массовая вставка не отправляет сигналы post_save.
+            ingredient_index.invalidate()
+            invalidate_cached_responses(INGREDIENTS_CACHE, RECIPES_CACHE)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Прочитано {read} строк, добавлено {created} новых '
+            f'ингредиентов за {elapsed:.2f} с.'
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.cart_totals import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает списки покупок пользователей по их корзинам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='users',
+            help='id пользователя; по умолчанию все'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            created = rebuild(options['users'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Списки покупок пересобраны, позиций: {created}.'
+        ))
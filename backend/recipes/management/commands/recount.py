@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.counters import recount
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики избранного, рецептов и подписчиков'
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            fixed = recount()
+        for counter, rows in fixed.items():
+            self.stdout.write(f'{counter}: исправлено строк — {rows}')
+        self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны.'))
@@ -0,0 +1,238 @@
+import heapq
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger('foodgram.slow_requests')
+
+# QueryRecorder текущего запроса. Переменная контекста видна и в потоках,
+# где асинхронные представления выполняют запросы к БД.
+current_recorder = ContextVar('current_recorder', default=None)
+
+# Границы корзин гистограммы времени ответа, в секундах.
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+TOP_QUERIES = 5
+MAX_SQL_LENGTH = 300
+
+
+class EndpointStats:
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.requests = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.sql_duration = 0.0
+
+    def observe(self, duration, queries, sql_duration):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                self.buckets[i] += 1
+        self.requests += 1
+        self.duration += duration
+        self.queries += queries
+        self.sql_duration += sql_duration
+
+
+class MetricsRegistry:
+    """Метрики запросов по представлениям в памяти процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(EndpointStats)
+
+    def observe(self, endpoint, duration, queries, sql_duration):
+        with self._lock:
+            self._stats[endpoint].observe(duration, queries, sql_duration)
+
+    def render(self):
+        """Метрики в текстовом формате Prometheus."""
+        with self._lock:
+            stats = sorted(self._stats.items())
+            lines = [
+                '# HELP foodgram_request_duration_seconds '
+                'Время обработки запроса.',
+                '# TYPE foodgram_request_duration_seconds histogram',
+            ]
+            for endpoint, item in stats:
+                label = f'endpoint="{endpoint}"'
+                for bound, count in zip(LATENCY_BUCKETS, item.buckets):
+                    lines.append(
+                        'foodgram_request_duration_seconds_bucket'
+                        f'{{{label},le="{bound}"}} {count}'
+                    )
+                lines.extend((
+                    'foodgram_request_duration_seconds_bucket'
+                    f'{{{label},le="+Inf"}} {item.requests}',
+                    'foodgram_request_duration_seconds_sum'
+                    f'{{{label}}} {item.duration:.6f}',
+                    'foodgram_request_duration_seconds_count'
+                    f'{{{label}}} {item.requests}',
+                ))
+            lines.extend((
+                '# HELP foodgram_db_queries_total Количество SQL-запросов.',
+                '# TYPE foodgram_db_queries_total counter',
+            ))
+            lines.extend(
+                f'foodgram_db_queries_total{{endpoint="{endpoint}"}} '
+                f'{item.queries}'
+                for endpoint, item in stats
+            )
+            lines.extend((
+                '# HELP foodgram_db_query_duration_seconds_total '
+                'Суммарное время SQL-запросов.',
+                '# TYPE foodgram_db_query_duration_seconds_total counter',
+            ))
+            lines.extend(
+                f'foodgram_db_query_duration_seconds_total'
+                f'{{endpoint="{endpoint}"}} {item.sql_duration:.6f}'
+                for endpoint, item in stats
+            )
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class QueryRecorder:
+    """
+    Обёртка выполнения SQL (connection.execute_wrapper): считает запросы,
+    их суммарное время и хранит самые долгие.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            entry = (duration, sql[:MAX_SQL_LENGTH])
+            if len(self.slowest) < TOP_QUERIES:
+                heapq.heappush(self.slowest, entry)
+            else:
+                heapq.heappushpop(self.slowest, entry)
+
+
+def record_query(execute, sql, params, many, context):
+    """Передаёт SQL-запрос в QueryRecorder текущего запроса, если он есть."""
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Обработчик connection_created: подключает record_query."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def endpoint_name(request):
+    """Имя представления: `RecipeViewSet.list`, `health_check` и т. п."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.func.__name__
+    actions = getattr(match.func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+class MetricsMiddleware:
+    """
+    Собирает время ответа, количество и время SQL-запросов по
+    представлениям. Для потоковых ответов замер завершается после
+    отдачи последней части. Медленные запросы пишутся в лог вместе
+    с самыми долгими SQL. Работает и в синхронной, и в асинхронной
+    цепочке middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        current_recorder.set(recorder)
+        try:
+            response = self.get_response(request)
+        except Exception:
+            self._finish(request, recorder, start)
+            raise
+        return self._track(response, request, recorder, start)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        current_recorder.set(recorder)
+        try:
+            response = await self.get_response(request)
+        except Exception:
+            self._finish(request, recorder, start)
+            raise
+        return self._track(response, request, recorder, start)
+
+    def _track(self, response, request, recorder, start):
+        if not response.streaming:
+            self._finish(request, recorder, start)
+        elif response.is_async:
+            response.streaming_content = self._astream(
+                response.streaming_content, request, recorder, start
+            )
+        else:
+            response.streaming_content = self._stream(
+                response.streaming_content, request, recorder, start
+            )
+        return response
+
+    def _stream(self, content, request, recorder, start):
+        try:
+            yield from content
+        finally:
+            self._finish(request, recorder, start)
+
+    async def _astream(self, content, request, recorder, start):
+        try:
+            async for part in content:
+                yield part
+        finally:
+            self._finish(request, recorder, start)
+
+    def _finish(self, request, recorder, start):
+        current_recorder.set(None)
+        duration = time.perf_counter() - start
+        endpoint = endpoint_name(request)
+        registry.observe(
+            endpoint, duration, recorder.count, recorder.duration
+        )
+        if duration >= settings.SLOW_REQUEST_THRESHOLD:
+            queries = '\n'.join(
+                f'  {query_time * 1000:.1f} мс: {sql}'
+                for query_time, sql in sorted(recorder.slowest, reverse=True)
+            )
+            logger.warning(
+                'Медленный запрос %s %s (%s): %.3f с, SQL: %d за %.3f с\n%s',
+                request.method, request.path, endpoint, duration,
+                recorder.count, recorder.duration, queries
+            )
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# Индексы специфичны для PostgreSQL, на других СУБД миграция пропускается.
+# Оба индекса построены по UPPER(name): это выражение Django использует
+# в поиске без учёта регистра (istartswith, icontains).
+FORWARD_SQL = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS ingredient_name_upper_like_idx '
+    'ON recipes_ingredient (UPPER(name) varchar_pattern_ops)',
+    'CREATE INDEX IF NOT EXISTS ingredient_name_trgm_idx '
+    'ON recipes_ingredient USING gin (UPPER(name) gin_trgm_ops)',
+)
+REVERSE_SQL = (
+    'DROP INDEX IF EXISTS ingredient_name_trgm_idx',
+    'DROP INDEX IF EXISTS ingredient_name_upper_like_idx',
+)
+
+
+def run_postgres_sql(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipe_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_postgres_sql(FORWARD_SQL),
+            run_postgres_sql(REVERSE_SQL),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.1 on 2026-10-18 04:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# Счётчик -> модель, которую он считает, и её внешний ключ.
+COUNTERS = (
+    ('recipes', 'Recipe', 'favorites_count', 'recipes', 'Favorite', 'recipe'),
+    ('users', 'User', 'recipes_count', 'recipes', 'Recipe', 'author'),
+    ('users', 'User', 'subscribers_count',
+     'recipes', 'Subscription', 'author'),
+    ('recipes', 'Ingredient', 'recipes_count',
+     'recipes', 'RecipeIngredient', 'ingredient'),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for app, model, field, counted_app, counted, fk_name in COUNTERS:
+        counted_model = apps.get_model(counted_app, counted)
+        total = Coalesce(Subquery(
+            counted_model.objects.filter(
+                **{fk_name: OuterRef('pk')}
+            ).order_by().values(fk_name).annotate(
+                total=Count('pk')
+            ).values('total')
+        ), 0)
+        apps.get_model(app, model).objects.update(**{field: total})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_ingredient_search_indexes'),
+        ('users', '0002_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество рецептов'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
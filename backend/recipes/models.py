@@ -1,13 +1,13 @@
 from django.db import models
 from django.core.validators import MinValueValidator
-from users.models import User
+from users.models import DerivedFieldsMixin, User
 
 MIN_COOKING_TIME = 1
 MAX_NAME_LENGTH = 256
 MAX_UNIT_LENGTH = 20
 
 
-class Ingredient(models.Model):
+class Ingredient(DerivedFieldsMixin, models.Model):
     """Модель ингредиента."""
     name = models.CharField(
         max_length=MAX_NAME_LENGTH,
@@ -19,6 +19,13 @@ class Ingredient(models.Model):
         verbose_name='Единица измерения',
         help_text='Введите единицу измерения'
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество рецептов'
+    )
+
+    derived_fields = ('recipes_count',)
 
     class Meta:
         verbose_name = 'Ингредиент'
@@ -35,12 +42,14 @@ class Ingredient(models.Model):
         return f'{self.name} ({self.measurement_unit})'
 
 
-class Recipe(models.Model):
+class Recipe(DerivedFieldsMixin, models.Model):
     """Модель рецепта."""
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='recipes',
+        # Покрыт индексами с author_id в начале.
+        db_index=False,
         verbose_name='Автор',
         help_text='Пользователь, создавший рецепт'
     )
@@ -56,6 +65,12 @@ class Recipe(models.Model):
         verbose_name='Изображение',
         help_text='Картинка рецепта'
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Варианты изображения'
+    )
     text = models.TextField(
         verbose_name='Описание',
         help_text='Как приготовить рецепт'
@@ -76,6 +91,13 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном'
+    )
+
+    derived_fields = ('image_variants', 'favorites_count')
 
     class Meta:
         verbose_name = 'Рецепт'
@@ -87,6 +109,17 @@ class Recipe(models.Model):
                 name='unique_author_recipe'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx'
+            ),
+            # Лента автора (?author=) и рецепты в подписках.
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='recipe_author_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -141,6 +174,12 @@ class UserRecipeRelation(models.Model):
                 name='%(class)s_unique'
             )
         ]
+        # Обратный поиск со стороны рецепта: счётчики, флаги, каскады.
+        indexes = [
+            models.Index(
+                fields=('recipe', 'user'), name='%(class)s_recipe_user_idx'
+            )
+        ]
 
     def __str__(self):
         return f'{self.user} -> {self.recipe}'
@@ -151,7 +190,8 @@ class Favorite(UserRecipeRelation):
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
-        related_name='favorited'
+        related_name='favorited',
+        db_index=False
     )
 
     class Meta(UserRecipeRelation.Meta):
@@ -164,7 +204,8 @@ class ShoppingCart(UserRecipeRelation):
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
-        related_name='in_shopping_cart'
+        related_name='in_shopping_cart',
+        db_index=False
     )
 
     class Meta(UserRecipeRelation.Meta):
@@ -182,6 +223,7 @@ class Subscription(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='subscribers',
+        db_index=False,
     )
 
     class Meta:
@@ -191,6 +233,46 @@ class Subscription(models.Model):
                 name='unique_subscription'
             )
         ]
+        # Подписчики автора: число подписчиков и is_subscribed.
+        indexes = [
+            models.Index(
+                fields=('author', 'user'), name='subscription_author_user_idx'
+            )
+        ]
 
     def __str__(self):
         return f'{self.user} подписан на {self.author}'
+
+
+class ShoppingListItem(models.Model):
+    """
+    Сумма ингредиента по всем рецептам в корзине пользователя.
+    Поддерживается при изменении корзины и ингредиентов рецептов.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    total_amount = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Количество'
+    )
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Списки покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_list_item'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user}: {self.ingredient} — {self.total_amount}'
@@ -0,0 +1,83 @@
+from django.utils.functional import cached_property
+
+from recipes.models import Favorite, ShoppingCart, Subscription
+
+
+class UserRelations:
+    """
+    Связи пользователя для флагов is_subscribed, is_favorited
+    и is_in_shopping_cart: множества id авторов в подписках, рецептов
+    в избранном и в корзине. Каждое загружается одним запросом при
+    первом обращении; для анонимного пользователя все пусты.
+
+    В представлениях объект один на запрос (см. `for_request`),
+    в админке и командах его можно создать для любого пользователя
+    и передать сериализаторам в контексте под ключом `relations`.
+    """
+
+    def __init__(self, user):
+        authenticated = user is not None and user.is_authenticated
+        self.user = user if authenticated else None
+
+    # Множество -> (модель, поле с id).
+    sources = {
+        'following': (Subscription, 'author_id'),
+        'favorites': (Favorite, 'recipe_id'),
+        'cart': (ShoppingCart, 'recipe_id'),
+    }
+
+    def _ids(self, name):
+        if self.user is None:
+            return frozenset()
+        model, field = self.sources[name]
+        return frozenset(
+            model.objects.filter(user=self.user).values_list(field, flat=True)
+        )
+
+    @cached_property
+    def following(self):
+        return self._ids('following')
+
+    @cached_property
+    def favorites(self):
+        return self._ids('favorites')
+
+    @cached_property
+    def cart(self):
+        return self._ids('cart')
+
+    async def aload(self):
+        """
+        Загружает все множества асинхронным ORM, чтобы сериализаторы
+        в async-представлениях не обращались к БД.
+        """
+        for name, (model, field) in self.sources.items():
+            if self.user is None:
+                ids = frozenset()
+            else:
+                ids = frozenset([
+                    pk async for pk in model.objects.filter(
+                        user=self.user
+                    ).values_list(field, flat=True).aiterator()
+                ])
+            self.__dict__[name] = ids
+        return self
+
+    def is_subscribed(self, author):
+        return author.pk in self.following
+
+    def is_favorited(self, recipe):
+        return recipe.pk in self.favorites
+
+    def is_in_shopping_cart(self, recipe):
+        return recipe.pk in self.cart
+
+    @classmethod
+    def for_request(cls, request):
+        """Связи текущего пользователя, общие для всего запроса."""
+        relations = getattr(request, '_user_relations', None)
+        if relations is None:
+            relations = cls(getattr(request, 'user', None))
+            if request is not None:
+                request._user_relations = relations
+        return relations
@@ -0,0 +1,134 @@
+from collections import defaultdict
+
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from recipes.cart_totals import (
+    recipe_amounts, shift_cart, shift_recipe, shift_totals
+)
+from recipes.counters import shift_counter
+from recipes.images import schedule_variants
+from recipes.ingredient_index import ingredient_index
+from recipes.models import (
+    Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart,
+    Subscription
+)
+from users.models import User
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    ingredient_index.invalidate()
+
+
+def _counter_delta(signal, created):
+    if signal is post_delete:
+        return -1
+    return 1 if created else 0
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+def update_favorites_count(sender, instance, signal, created=False, **kwargs):
+    shift_counter(
+        Recipe.objects.filter(pk=instance.recipe_id),
+        'favorites_count', _counter_delta(signal, created)
+    )
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def update_recipes_count(sender, instance, signal, created=False, **kwargs):
+    shift_counter(
+        User.objects.filter(pk=instance.author_id),
+        'recipes_count', _counter_delta(signal, created)
+    )
+
+
+@receiver((post_save, post_delete), sender=Subscription)
+def update_subscribers_count(sender, instance, signal, created=False,
+                             **kwargs):
+    shift_counter(
+        User.objects.filter(pk=instance.author_id),
+        'subscribers_count', _counter_delta(signal, created)
+    )
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def update_ingredient_recipes_count(sender, instance, signal, created=False,
+                                    **kwargs):
+    shift_counter(
+        Ingredient.objects.filter(pk=instance.ingredient_id),
+        'recipes_count', _counter_delta(signal, created)
+    )
+
+
+def _direct_delete(origin, model):
+    """Удаляют сами строки `model`, а не каскадом от рецепта или автора."""
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return isinstance(origin, model)
+
+
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def update_shopping_list(sender, instance, signal, created=False,
+                         origin=None, **kwargs):
+    # При каскаде ингредиенты рецепта могут быть уже удалены:
+    # списки покупок правит remove_recipe_from_shopping_lists.
+    if signal is post_delete and not _direct_delete(origin, ShoppingCart):
+        return
+    delta = _counter_delta(signal, created)
+    if delta:
+        shift_cart(instance.user_id, [instance.recipe_id], delta)
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def remember_recipe_ingredient(sender, instance, **kwargs):
+    instance._stored = None
+    if not instance._state.adding:
+        instance._stored = RecipeIngredient.objects.filter(
+            pk=instance.pk
+        ).values_list('recipe_id', 'ingredient_id', 'amount').first()
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def update_shopping_lists_on_save(sender, instance, **kwargs):
+    deltas = defaultdict(int)
+    deltas[instance.ingredient_id] += instance.amount
+    stored = getattr(instance, '_stored', None)
+    if stored:
+        recipe_id, ingredient_id, amount = stored
+        if recipe_id == instance.recipe_id:
+            deltas[ingredient_id] -= amount
+        else:
+            shift_recipe(recipe_id, {ingredient_id: -amount})
+    shift_recipe(instance.recipe_id, deltas)
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def update_shopping_lists_on_delete(sender, instance, origin=None,
+                                    **kwargs):
+    if _direct_delete(origin, RecipeIngredient):
+        shift_recipe(
+            instance.recipe_id, {instance.ingredient_id: -instance.amount}
+        )
+
+
+@receiver(pre_delete, sender=Recipe)
+def remove_recipe_from_shopping_lists(sender, instance, **kwargs):
+    user_ids = list(ShoppingCart.objects.filter(
+        recipe_id=instance.pk
+    ).values_list('user_id', flat=True))
+    if user_ids:
+        shift_totals(user_ids, recipe_amounts([instance.pk], -1))
+
+
+@receiver(post_save, sender=Recipe)
+def schedule_recipe_image_variants(sender, instance, **kwargs):
+    schedule_variants(instance, 'image', 'image_variants')
+
+
+@receiver(post_save, sender=User)
+def schedule_avatar_variants(sender, instance, **kwargs):
+    schedule_variants(instance, 'avatar', 'avatar_variants')
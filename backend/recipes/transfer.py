@@ -0,0 +1,227 @@
+import json
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils.dateparse import parse_datetime
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from users.models import User
+
+CHUNK_SIZE = 2000
+BATCH_SIZE = 1000
+AUTHOR_FIELDS = ('email', 'username', 'first_name', 'last_name')
+
+
+def _serialize(recipe):
+    return {
+        'author': {
+            field: getattr(recipe.author, field) for field in AUTHOR_FIELDS
+        },
+        'name': recipe.name,
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+        'pub_date': recipe.pub_date.isoformat(),
+        'image': recipe.image.name or None,
+        'image_variants': recipe.image_variants,
+        'ingredients': [
+            {
+                'name': item.ingredient.name,
+                'measurement_unit': item.ingredient.measurement_unit,
+                'amount': item.amount,
+            }
+            for item in recipe.recipe_ingredients.all()
+        ],
+    }
+
+
+def export_recipes(file, chunk_size=CHUNK_SIZE):
+    """
+    Пишет рецепты в формате JSON Lines. Рецепты читаются курсором
+    порциями по chunk_size, ингредиенты — одним запросом на порцию.
+    Возвращает количество рецептов.
+    """
+    recipes = Recipe.objects.select_related('author').only(
+        *(f'author__{field}' for field in AUTHOR_FIELDS),
+        'name', 'text', 'cooking_time', 'pub_date', 'image',
+        'image_variants'
+    ).prefetch_related(Prefetch(
+        'recipe_ingredients',
+        queryset=RecipeIngredient.objects.select_related(
+            'ingredient'
+        ).only('recipe_id', 'amount', 'ingredient__name',
+               'ingredient__measurement_unit').order_by('id')
+    )).order_by('id')
+    count = 0
+    for recipe in recipes.iterator(chunk_size=chunk_size):
+        file.write(json.dumps(_serialize(recipe), ensure_ascii=False))
+        file.write('\n')
+        count += 1
+    return count
+
+
+def _parse(number, line):
+    try:
+        item = json.loads(line)
+        recipe = {
+            'author': item['author'],
+            'name': item['name'],
+            'text': item['text'],
+            'cooking_time': int(item['cooking_time']),
+            'pub_date': parse_datetime(item['pub_date']),
+            'image': item.get('image') or None,
+            'image_variants': item.get('image_variants') or {},
+            'ingredients': [
+                (
+                    ingredient['name'],
+                    ingredient['measurement_unit'],
+                    int(ingredient['amount']),
+                )
+                for ingredient in item['ingredients']
+            ],
+        }
+    except (KeyError, TypeError, ValueError) as error:
+        raise ValueError(f'Строка {number}: {error!r}')
+    if recipe['cooking_time'] < 1 or any(
+        amount < 1 for *_, amount in recipe['ingredients']
+    ):
+        raise ValueError(f'Строка {number}: значения должны быть больше 0.')
+    if len({item[:2] for item in recipe['ingredients']}) < len(
+        recipe['ingredients']
+    ):
+        raise ValueError(f'Строка {number}: ингредиенты повторяются.')
+    return recipe
+
+
+class RecipeImporter:
+    """
+    Загружает рецепты пачками: авторы и ингредиенты сопоставляются
+    по словарям, заполненным заранее, рецепты и их ингредиенты
+    создаются через bulk_create сразу для всей пачки.
+    Рецепты, уже существующие у автора с тем же названием, пропускаются.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.ingredients = {
+            (name, unit): pk for pk, name, unit in
+            Ingredient.objects.values_list('id', 'name', 'measurement_unit')
+            .iterator(chunk_size=CHUNK_SIZE)
+        }
+        self.authors = dict(User.objects.values_list('email', 'id'))
+        self.created = 0
+        self.skipped = 0
+
+    def _resolve_authors(self, batch):
+        missing = {
+            recipe['author']['email']: recipe['author'] for recipe in batch
+            if recipe['author']['email'] not in self.authors
+        }
+        if not missing:
+            return
+        users = []
+        for data in missing.values():
+            user = User(**{field: data[field] for field in AUTHOR_FIELDS})
+            user.set_unusable_password()
+            users.append(user)
+        User.objects.bulk_create(users, ignore_conflicts=True)
+        self.authors.update(User.objects.filter(
+            email__in=missing
+        ).values_list('email', 'id'))
+        lost = missing.keys() - self.authors.keys()
+        if lost:
+            raise ValueError(
+                f'Не удалось создать авторов: {", ".join(sorted(lost))}'
+            )
+
+    def _resolve_ingredients(self, batch):
+        missing = {
+            (name, unit) for recipe in batch
+            for name, unit, _ in recipe['ingredients']
+            if (name, unit) not in self.ingredients
+        }
+        if not missing:
+            return
+        Ingredient.objects.bulk_create(
+            (Ingredient(name=name, measurement_unit=unit)
+             for name, unit in missing),
+            ignore_conflicts=True
+        )
+        for pk, name, unit in Ingredient.objects.filter(
+            name__in={name for name, _ in missing}
+        ).values_list('id', 'name', 'measurement_unit'):
+            self.ingredients[name, unit] = pk
+
+    def _new_recipes(self, batch):
+        author_ids = {self.authors[r['author']['email']] for r in batch}
+        existing = set(Recipe.objects.filter(
+            author_id__in=author_ids,
+            name__in={recipe['name'] for recipe in batch}
+        ).values_list('author_id', 'name'))
+        new = {}
+        for recipe in batch:
+            key = (self.authors[recipe['author']['email']], recipe['name'])
+            if key in existing or key in new:
+                self.skipped += 1
+                continue
+            new[key] = recipe
+        return new
+
+    @transaction.atomic
+    def import_batch(self, batch):
+        self._resolve_authors(batch)
+        self._resolve_ingredients(batch)
+        new = self._new_recipes(batch)
+        if not new:
+            return
+        recipes = [
+            Recipe(
+                author_id=author_id,
+                name=name,
+                text=data['text'],
+                cooking_time=data['cooking_time'],
+                image=data['image'],
+                image_variants=data['image_variants'],
+            )
+            for (author_id, name), data in new.items()
+        ]
+        Recipe.objects.bulk_create(recipes)
+        if any(recipe.pk is None for recipe in recipes):
+            # Бэкенд не возвращает ключи из bulk_create.
+            ids = {
+                (author_id, name): pk
+                for author_id, name, pk in Recipe.objects.filter(
+                    author_id__in={recipe.author_id for recipe in recipes},
+                    name__in={recipe.name for recipe in recipes}
+                ).values_list('author_id', 'name', 'id')
+            }
+            for recipe in recipes:
+                recipe.pk = ids[recipe.author_id, recipe.name]
+        # auto_now_add перезаписывает дату при вставке: возвращаем исходную.
+        dated = []
+        for recipe, data in zip(recipes, new.values()):
+            if data['pub_date'] is not None:
+                recipe.pub_date = data['pub_date']
+                dated.append(recipe)
+        Recipe.objects.bulk_update(dated, ['pub_date'])
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe_id=recipe.pk,
+                ingredient_id=self.ingredients[name, unit],
+                amount=amount
+            )
+            for recipe, data in zip(recipes, new.values())
+            for name, unit, amount in data['ingredients']
+        )
+        self.created += len(recipes)
+
+    def run(self, lines, on_batch=None):
+        recipes = (
+            _parse(number, line)
+            for number, line in enumerate(lines, 1) if line.strip()
+        )
+        while batch := list(islice(recipes, self.batch_size)):
+            self.import_batch(batch)
+            if on_batch:
+                on_batch(self.created, self.skipped)
+        return self.created, self.skipped
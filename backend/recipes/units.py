@@ -0,0 +1,90 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Единица -> (базовая единица, сколько базовых в одной).
+UNIT_CONVERSIONS = {
+    'кг': ('г', 1000),
+    'л': ('мл', 1000),
+    'ст. л.': ('ч. л.', 3),
+}
+
+ShoppingListLine = namedtuple(
+    'ShoppingListLine', ('name', 'measurement_unit', 'amount')
+)
+
+
+def scale_factors(recipe_ids, per_recipe, default=1):
+    """
+    Множитель порций для каждой строки: из словаря {recipe_id: порции},
+    для остальных рецептов — `default`.
+    """
+    recipe_ids = np.asarray(recipe_ids, dtype=np.int64)
+    factors = np.full(len(recipe_ids), default, dtype=np.float64)
+    if per_recipe and len(recipe_ids):
+        keys = np.fromiter(sorted(per_recipe), dtype=np.int64)
+        values = np.array([per_recipe[key] for key in keys], dtype=np.float64)
+        positions = np.searchsorted(keys, recipe_ids).clip(max=len(keys) - 1)
+        found = keys[positions] == recipe_ids
+        factors[found] = values[positions[found]]
+    return factors
+
+
+def _normalize(amount):
+    amount = round(float(amount), 2)
+    return int(amount) if amount.is_integer() else amount
+
+
+def _groups(ingredient_ids, catalog):
+    """
+    Группа (название, базовая единица) для каждого из различных
+    ингредиентов и множитель перевода его единицы в базовую.
+    """
+    keys = {}
+    group_of = np.empty(len(ingredient_ids), dtype=np.intp)
+    multipliers = np.empty(len(ingredient_ids), dtype=np.float64)
+    units = {}
+    for i, pk in enumerate(ingredient_ids.tolist()):
+        name, unit = catalog[pk]
+        base, multipliers[i] = UNIT_CONVERSIONS.get(unit, (unit, 1))
+        group_of[i] = keys.setdefault((name, base), len(keys))
+        units.setdefault(group_of[i], set()).add(unit)
+    return list(keys), group_of, multipliers, units
+
+
+def aggregate(ingredient_ids, amounts, catalog, factors=None):
+    """
+    Сводит строки (ингредиент, количество) в список покупок.
+    Суммы по строкам считаются массивами NumPy, без цикла по строкам;
+    по словарю `catalog` {id: (название, единица)} перебираются только
+    различные ингредиенты. Совместимые единицы из UNIT_CONVERSIONS
+    переводятся в базовую и складываются; если у ингредиента встретилась
+    одна единица, она сохраняется. Результат отсортирован по названию.
+    """
+    ingredient_ids = np.asarray(ingredient_ids, dtype=np.int64)
+    if not len(ingredient_ids):
+        return []
+    amounts = np.asarray(amounts, dtype=np.float64)
+    if factors is not None:
+        amounts = amounts * factors
+
+    unique_ids, row_ingredient = np.unique(
+        ingredient_ids, return_inverse=True
+    )
+    per_ingredient = np.bincount(row_ingredient, weights=amounts)
+    keys, group_of, multipliers, units = _groups(unique_ids, catalog)
+    totals = np.bincount(
+        group_of, weights=per_ingredient * multipliers, minlength=len(keys)
+    )
+
+    lines = []
+    for group, (name, base) in enumerate(keys):
+        total = totals[group]
+        if len(units[group]) == 1:
+            unit, = units[group]
+            total /= UNIT_CONVERSIONS.get(unit, (unit, 1))[1]
+        else:
+            unit = base
+        lines.append(ShoppingListLine(name, unit, _normalize(total)))
+    lines.sort(key=lambda line: (line.name, line.measurement_unit))
+    return lines
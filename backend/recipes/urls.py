@@ -1,12 +1,22 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
+    ahealth_check,
+    ashort_link_redirect_view,
     health_check,
+    metrics,
     short_link_redirect_view,
 )
 
 app_name = 'recipes'
 
+if settings.ASYNC_VIEWS:
+    health_view, short_link_view = ahealth_check, ashort_link_redirect_view
+else:
+    health_view, short_link_view = health_check, short_link_redirect_view
+
 urlpatterns = [
-    path('health', health_check, name='health-check'),
-    path('<int:recipe_id>/', short_link_redirect_view, name='short-link-redirect'),
+    path('health', health_view, name='health-check'),
+    path('metrics', metrics, name='metrics'),
+    path('<int:recipe_id>/', short_link_view, name='short-link-redirect'),
 ]
@@ -1,5 +1,8 @@
-from django.http.response import JsonResponse
+from django.conf import settings
+from django.http import Http404
+from django.http.response import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
+from recipes.metrics import registry
 from recipes.models import Recipe
 
 
@@ -12,5 +15,33 @@ def short_link_redirect_view(request, recipe_id):
     return redirect(f'/recipes/{recipe_id}/')
 
 
+async def ashort_link_redirect_view(request, recipe_id):
+    """Асинхронный вариант short_link_redirect_view."""
+    if not await Recipe.objects.filter(id=recipe_id).aexists():
+        raise Http404('Рецепт не найден.')
+    return redirect(f'/recipes/{recipe_id}/')
+
+
 def health_check(request):
     return JsonResponse({'status': 'ok'})
+
+
+async def ahealth_check(request):
+    return JsonResponse({'status': 'ok'})
+
+
+def metrics(request):
+    """
+    Метрики процесса в текстовом формате Prometheus: только числа
+    по представлениям, без текста SQL. Доступны при METRICS_ENABLED
+    и, если задан METRICS_ALLOWED_IPS, только с этих адресов.
+    """
+    allowed = settings.METRICS_ALLOWED_IPS
+    if not settings.METRICS_ENABLED or (
+        allowed and request.META.get('REMOTE_ADDR') not in allowed
+    ):
+        raise Http404
+    return HttpResponse(
+        registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
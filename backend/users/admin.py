@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models import Count
 from django.utils.safestring import mark_safe
 from django.utils.html import format_html
 
@@ -23,6 +24,11 @@ class UserAdmin(BaseUserAdmin):
     list_filter = ('is_staff', 'is_superuser', 'is_active')
     ordering = ('username',)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            subscriptions_total=Count('subscriptions')
+        )
+
     @admin.display(description='ФИО')
     def full_name(self, obj):
         return f'{obj.first_name} {obj.last_name}'
@@ -39,15 +45,15 @@ class UserAdmin(BaseUserAdmin):
 
     @admin.display(description='Рецептов')
     def recipe_count(self, obj):
-        return obj.recipes.count()
+        return obj.recipes_count
 
     @admin.display(description='Подписок')
     def subscriptions_count(self, obj):
-        return obj.subscriptions.count()
+        return obj.subscriptions_total
 
     @admin.display(description='Подписчиков')
     def subscribers_count(self, obj):
-        return obj.subscribers.count()
+        return obj.subscribers_count
 
     fieldsets = (
         (None, {
@@ -3,7 +3,32 @@ from django.core.validators import RegexValidator
 from django.db import models
 
 
-class User(AbstractUser):
+class DerivedFieldsMixin:
+    """
+    Не записывает поля `derived_fields` при обычном сохранении.
+    Счётчики сдвигаются UPDATE по F(), варианты изображений пишет
+    фоновая задача; полный save() устаревшего экземпляра затёр бы их.
+    Изменить такие поля можно только явным update_fields.
+    """
+    derived_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.derived_fields
+                and field.attname not in deferred
+            ]
+        return super().save(*args, **kwargs)
+
+
+class User(DerivedFieldsMixin, AbstractUser):
     email = models.EmailField(
         unique=True,
         max_length=100,
@@ -37,6 +62,24 @@ class User(AbstractUser):
         verbose_name='Аватар',
         help_text='Загрузите изображение профиля'
     )
+    avatar_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Варианты аватара'
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество рецептов'
+    )
+    subscribers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество подписчиков'
+    )
+
+    derived_fields = ('avatar_variants', 'recipes_count', 'subscribers_count')
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']